@@ -1,8 +1,12 @@
 import os
+import re
+import fnmatch
+import heapq
 import logging
-import shutil
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
 
 class CleanupManager:
     def __init__(self, base_dir: str = None):
@@ -15,7 +19,8 @@ class CleanupManager:
         self.base_dir = base_dir or os.getcwd()
         self.logger = logging.getLogger(__name__)
         
-    def cleanup_folder(self, folder_name: str, max_age_days: int = 7, keep_latest: int = 10) -> Dict[str, Any]:
+    def cleanup_folder(self, folder_name: str, max_age_days: int = 7, keep_latest: int = 10,
+                       pattern: Optional[str] = None) -> Dict[str, Any]:
         """
         Clean up files in a folder based on age and count.
         
@@ -23,6 +28,7 @@ class CleanupManager:
             folder_name: Name of the folder to clean
             max_age_days: Maximum age of files to keep (in days)
             keep_latest: Minimum number of latest files to keep regardless of age
+            pattern: Optional glob (e.g. "*.log"); only matching files are considered
             
         Returns:
             Dictionary with cleanup statistics
@@ -34,44 +40,77 @@ class CleanupManager:
             
         self.logger.info(f"Starting cleanup of {folder_path}")
         
-        # Get all files with their modification times
-        files = []
-        for filename in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, filename)
-            if os.path.isfile(file_path):
-                mod_time = os.path.getmtime(file_path)
-                files.append((file_path, mod_time))
+        # Match names before touching the entry so skipped files cost no stat()
+        name_filter = re.compile(fnmatch.translate(pattern)).match if pattern else None
         
-        # Sort files by modification time (newest first)
-        files.sort(key=lambda x: x[1], reverse=True)
-        
-        # Keep the latest N files
-        protected_files = files[:keep_latest] if keep_latest > 0 else []
-        protected_paths = [f[0] for f in protected_files]
-        
-        # Calculate the cutoff date
-        cutoff_date = datetime.now() - timedelta(days=max_age_days)
-        cutoff_timestamp = cutoff_date.timestamp()
-        
-        # Delete old files
-        deleted_count = 0
-        deleted_size = 0
-        
-        for file_path, mod_time in files:
-            # Skip if file is in protected list
-            if file_path in protected_paths:
-                continue
-                
-            # Delete if older than cutoff date
-            if mod_time < cutoff_timestamp:
-                try:
-                    file_size = os.path.getsize(file_path)
-                    os.remove(file_path)
-                    deleted_count += 1
-                    deleted_size += file_size
-                    self.logger.debug(f"Deleted old file: {file_path}")
-                except Exception as e:
-                    self.logger.error(f"Error deleting file {file_path}: {str(e)}")
+        # Scan and unlink relative to an open directory descriptor where the
+        # platform supports it (fstatat/unlinkat), so no entry re-resolves the folder path
+        dir_fd = None
+        if os.scandir in os.supports_fd and os.remove in os.supports_dir_fd:
+            dir_fd = os.open(folder_path, os.O_RDONLY)
+            
+        try:
+            # Calculate the cutoff timestamp
+            cutoff_timestamp = time.time() - max_age_days * 86400.0
+            
+            # Scan once, keeping only files older than the cutoff as deletion
+            # candidates and tracking the latest N files in a bounded min-heap
+            candidates = []
+            latest = []
+            with os.scandir(folder_path if dir_fd is None else dir_fd) as entries:
+                for entry in entries:
+                    if name_filter is not None and not name_filter(entry.name):
+                        continue
+                        
+                    if entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_mtime < cutoff_timestamp:
+                            candidates.append((entry.name, st.st_size))
+                        
+                        if keep_latest > 0:
+                            if len(latest) < keep_latest:
+                                heapq.heappush(latest, (st.st_mtime, entry.name))
+                            else:
+                                heapq.heappushpop(latest, (st.st_mtime, entry.name))
+            
+            # Keep the latest N files
+            protected_names = frozenset(name for _, name in latest)
+            to_delete = [
+                (name, file_size)
+                for name, file_size in candidates
+                if name not in protected_names
+            ]
+            
+            # Delete old files in parallel to overlap unlink latency
+            deleted_count = 0
+            deleted_size = 0
+            
+            if to_delete:
+                max_workers = min(32, (os.cpu_count() or 1) * 4, len(to_delete))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(
+                            os.remove,
+                            name if dir_fd is not None else os.path.join(folder_path, name),
+                            dir_fd=dir_fd
+                        ): (name, file_size)
+                        for name, file_size in to_delete
+                    }
+                    
+                    for future in as_completed(futures):
+                        name, file_size = futures[future]
+                        file_path = os.path.join(folder_path, name)
+                        error = future.exception()
+                        if error is not None:
+                            self.logger.error(f"Error deleting file {file_path}: {str(error)}")
+                            continue
+                            
+                        deleted_count += 1
+                        deleted_size += file_size
+                        self.logger.debug(f"Deleted old file: {file_path}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
         
         # Format the deleted size
         deleted_size_mb = deleted_size / (1024 * 1024)
@@ -92,6 +131,7 @@ class CleanupManager:
         
         Args:
             folder_configs: Dictionary mapping folder names to cleanup configurations
+                (max_age_days, keep_latest and an optional glob pattern)
             
         Returns:
             Dictionary with cleanup results for all folders
@@ -105,12 +145,25 @@ class CleanupManager:
                 "analysis": {"max_age_days": 30, "keep_latest": 50}
             }
         
-        results = {}
-        for folder, config in folder_configs.items():
-            results[folder] = self.cleanup_folder(
-                folder_name=folder,
-                max_age_days=config.get("max_age_days", 7),
-                keep_latest=config.get("keep_latest", 10)
-            )
+        if not folder_configs:
+            return {}
+        
+        # Folders are disjoint, so clean them concurrently
+        with ThreadPoolExecutor(max_workers=len(folder_configs)) as executor:
+            futures = {
+                executor.submit(
+                    self.cleanup_folder,
+                    folder_name=folder,
+                    max_age_days=config.get("max_age_days", 7),
+                    keep_latest=config.get("keep_latest", 10),
+                    pattern=config.get("pattern")
+                ): folder
+                for folder, config in folder_configs.items()
+            }
+            
+            results = {}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
         
-        return results
\ No newline at end of file
+        # Preserve the configured folder order in the results
+        return {folder: results[folder] for folder in folder_configs}
\ No newline at end of file
@@ -1,7 +1,82 @@
 import os
+import copy
 import json
 import logging
-from typing import Dict, Any, List, Optional
+import mmap
+from contextlib import contextmanager
+from typing import Dict, Any, List
+from json_utils import dump_file, loads
+
+try:
+    import ijson
+except ImportError:  # Sections are then read with a full parse
+    ijson = None
+
+
+# Template for new configuration files; copied before use
+_DEFAULT_CONFIG = {
+    "telegram": {
+        "api_id": "",
+        "api_hash": "",
+        "bot_token": "",
+        "channels": [],
+        "subscribers": []
+    },
+    "llm": {
+        "api_key": "",
+        "base_url": "https://api.openai.com/v1",
+        "model": "gpt-4-vision-preview",
+        "max_tokens": 1000
+    },
+    "scheduler": {
+        "collection_interval": "1h",
+        "analysis_interval": "3h",
+        "cleanup_interval": "24h"  # Add cleanup interval
+    },
+    # Add cleanup configuration
+    "cleanup": {
+        "folders": {
+            "media": {"max_age_days": 7, "keep_latest": 100},
+            "logs": {"max_age_days": 30, "keep_latest": 10},
+            "data": {"max_age_days": 14, "keep_latest": 20},
+            "analysis": {"max_age_days": 30, "keep_latest": 50}
+        }
+    },
+    "channel_descriptions": {},
+    "analysis_prompts": {
+        "default": "Analyze the following messages from various Telegram channels. Provide a concise summary highlighting key information, trends, and insights. Include the most important points from each channel, considering their context and focus.",
+        "tech_news": "Analyze these technology news updates. Focus on emerging trends, significant product launches, and important developments in the tech industry. Highlight potential impacts on the market and consumers.",
+        "finance": "Analyze these financial updates. Identify key market movements, important economic indicators, and significant company announcements. Provide context on how these developments might affect investors."
+    },
+}
+
+
+def load_config_section(section: str, config_file: str = "config.json") -> Any:
+    """
+    Read a single top-level section from a configuration file without
+    building the whole configuration. Intended for read-only workers.
+    
+    Args:
+        section: Configuration section to read
+        config_file: Path to the configuration file
+        
+    Returns:
+        Section value, or None if the file or section does not exist
+    """
+    if not os.path.exists(config_file) or os.path.getsize(config_file) == 0:
+        return None
+        
+    with open(config_file, 'rb') as f:
+        if ijson is None:
+            return loads(f.read()).get(section)
+            
+        # Stream the memory-mapped file and stop at the first match
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for value in ijson.items(mm, section, use_float=True):
+                return value
+                
+    return None
+
 
 class ConfigManager:
     def __init__(self, config_file: str = "config.json"):
@@ -14,6 +89,11 @@ class ConfigManager:
         self.config_file = config_file
         self.logger = logging.getLogger(__name__)
         self.config = self._load_config()
+        self._bind_sections()
+        
+        # Pending changes are written once the outermost batch() exits
+        self._dirty = False
+        self._batch_depth = 0
         
     def _load_config(self) -> Dict[str, Any]:
         """
@@ -24,8 +104,8 @@ class ConfigManager:
         """
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    return loads(f.read())
             else:
                 # Create default configuration
                 default_config = self._create_default_config()
@@ -36,6 +116,20 @@ class ConfigManager:
             self.logger.error(f"Error loading configuration: {str(e)}")
             return self._create_default_config()
     
+    def _bind_sections(self):
+        """Cache direct references to frequently accessed configuration sections."""
+        self._telegram = self.config.setdefault("telegram", {})
+        self._channels = self._telegram.setdefault("channels", [])
+        self._subscribers = self._telegram.setdefault("subscribers", [])
+        self._channel_descriptions = self.config.setdefault("channel_descriptions", {})
+        
+        # Sets mirror the lists for O(1) membership checks; the lists keep the saved order
+        self._channels_set = set(self._channels)
+        self._subscribers_set = set(self._subscribers)
+        
+        # Resolved analysis prompts by type, cleared whenever prompts change
+        self._prompt_cache = {}
+    
     def _create_default_config(self) -> Dict[str, Any]:
         """
         Create default configuration.
@@ -43,59 +137,59 @@ class ConfigManager:
         Returns:
             Default configuration dictionary
         """
-        return {
-            "telegram": {
-                "api_id": "",
-                "api_hash": "",
-                "bot_token": "",
-                "channels": [],
-                "subscribers": []
-            },
-            "llm": {
-                "api_key": "",
-                "base_url": "https://api.openai.com/v1",
-                "model": "gpt-4-vision-preview",
-                "max_tokens": 1000
-            },
-            "scheduler": {
-                "collection_interval": "1h",
-                "analysis_interval": "3h",
-                "cleanup_interval": "24h"  # Add cleanup interval
-            },
-            # Add cleanup configuration
-            "cleanup": {
-                "folders": {
-                    "media": {"max_age_days": 7, "keep_latest": 100},
-                    "logs": {"max_age_days": 30, "keep_latest": 10},
-                    "data": {"max_age_days": 14, "keep_latest": 20},
-                    "analysis": {"max_age_days": 30, "keep_latest": 50}
-                }
-            },
-            "channel_descriptions": {},
-            "analysis_prompts": {
-                "default": "Analyze the following messages from various Telegram channels. Provide a concise summary highlighting key information, trends, and insights. Include the most important points from each channel, considering their context and focus.",
-                "tech_news": "Analyze these technology news updates. Focus on emerging trends, significant product launches, and important developments in the tech industry. Highlight potential impacts on the market and consumers.",
-                "finance": "Analyze these financial updates. Identify key market movements, important economic indicators, and significant company announcements. Provide context on how these developments might affect investors."
-            },
-        }
+        return copy.deepcopy(_DEFAULT_CONFIG)
         
-    def _save_config(self, config: Dict[str, Any] = None):
+    def _save_config(self, config: Dict[str, Any] = None) -> bool:
         """
         Save configuration to file.
         
         Args:
             config: Configuration dictionary to save (uses self.config if None)
+            
+        Returns:
+            Success flag
         """
         try:
             config_to_save = config if config is not None else self.config
             
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_to_save, f, ensure_ascii=False, indent=2)
+            # Replaced atomically so a crash never leaves a truncated config
+            dump_file(self.config_file, config_to_save, indent=True)
                 
             self.logger.info(f"Configuration saved to {self.config_file}")
+            return True
             
         except Exception as e:
             self.logger.error(f"Error saving configuration: {str(e)}")
+            return False
+    
+    def _mark_dirty(self):
+        """Record a configuration change and write it unless inside a batch."""
+        self._dirty = True
+        if self._batch_depth == 0:
+            self.flush()
+    
+    def flush(self):
+        """Write pending configuration changes to file."""
+        if self._dirty and self._save_config():
+            self._dirty = False
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group several configuration changes into a single write.
+        
+        Example:
+            with config_manager.batch():
+                config_manager.add_channel("techcrunch")
+                config_manager.add_subscriber("USER_ID_1")
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
     
     def get_config(self, section: str = None, key: str = None) -> Any:
         """
@@ -135,8 +229,15 @@ class ConfigManager:
             if section not in self.config:
                 self.config[section] = {}
                 
-            self.config[section][key] = value
-            self._save_config()
+            section_config = self.config[section]
+            if key in section_config and section_config[key] == value:
+                return True
+                
+            section_config[key] = value
+            if section in ("telegram", "channel_descriptions", "analysis_prompts"):
+                self._bind_sections()
+                
+            self._mark_dirty()
             return True
             
         except Exception as e:
@@ -155,18 +256,20 @@ class ConfigManager:
             Success flag
         """
         try:
-            channels = self.config["telegram"]["channels"]
+            changed = False
             
-            if channel not in channels:
-                channels.append(channel)
+            if channel not in self._channels_set:
+                self._channels_set.add(channel)
+                self._channels.append(channel)
+                changed = True
                 
-            if description and channel not in self.config.get("channel_descriptions", {}):
-                if "channel_descriptions" not in self.config:
-                    self.config["channel_descriptions"] = {}
-                    
-                self.config["channel_descriptions"][channel] = description
+            if description and channel not in self._channel_descriptions:
+                self._channel_descriptions[channel] = description
+                changed = True
+                
+            if changed:
+                self._mark_dirty()
                 
-            self._save_config()
             return True
             
         except Exception as e:
@@ -184,15 +287,20 @@ class ConfigManager:
             Success flag
         """
         try:
-            channels = self.config["telegram"]["channels"]
+            changed = False
             
-            if channel in channels:
-                channels.remove(channel)
+            if channel in self._channels_set:
+                self._channels_set.discard(channel)
+                self._channels.remove(channel)
+                changed = True
+                
+            if channel in self._channel_descriptions:
+                del self._channel_descriptions[channel]
+                changed = True
                 
-            if "channel_descriptions" in self.config and channel in self.config["channel_descriptions"]:
-                del self.config["channel_descriptions"][channel]
+            if changed:
+                self._mark_dirty()
                 
-            self._save_config()
             return True
             
         except Exception as e:
@@ -210,11 +318,10 @@ class ConfigManager:
             Success flag
         """
         try:
-            subscribers = self.config["telegram"]["subscribers"]
-            
-            if user_id not in subscribers:
-                subscribers.append(user_id)
-                self._save_config()
+            if user_id not in self._subscribers_set:
+                self._subscribers_set.add(user_id)
+                self._subscribers.append(user_id)
+                self._mark_dirty()
                 
             return True
             
@@ -233,11 +340,10 @@ class ConfigManager:
             Success flag
         """
         try:
-            subscribers = self.config["telegram"]["subscribers"]
-            
-            if user_id in subscribers:
-                subscribers.remove(user_id)
-                self._save_config()
+            if user_id in self._subscribers_set:
+                self._subscribers_set.discard(user_id)
+                self._subscribers.remove(user_id)
+                self._mark_dirty()
                 
             return True
             
@@ -252,7 +358,7 @@ class ConfigManager:
         Returns:
             List of channel usernames/IDs
         """
-        return self.config.get("telegram", {}).get("channels", [])
+        return self._channels
     
     def get_subscribers(self) -> List[str]:
         """
@@ -261,7 +367,7 @@ class ConfigManager:
         Returns:
             List of user IDs
         """
-        return self.config.get("telegram", {}).get("subscribers", [])
+        return self._subscribers
     
     def get_channel_descriptions(self) -> Dict[str, str]:
         """
@@ -270,7 +376,7 @@ class ConfigManager:
         Returns:
             Dictionary mapping channels to descriptions
         """
-        return self.config.get("channel_descriptions", {})
+        return self._channel_descriptions
     
     def get_analysis_prompt(self, prompt_type: str = "default") -> str:
         """
@@ -282,8 +388,13 @@ class ConfigManager:
         Returns:
             Prompt string
         """
-        prompts = self.config.get("analysis_prompts", {})
-        return prompts.get(prompt_type, prompts.get("default", ""))
+        prompt = self._prompt_cache.get(prompt_type)
+        if prompt is None:
+            prompts = self.config.get("analysis_prompts", {})
+            prompt = prompts.get(prompt_type, prompts.get("default", ""))
+            self._prompt_cache[prompt_type] = prompt
+            
+        return prompt
     
     def set_analysis_prompt(self, prompt_type: str, prompt: str) -> bool:
         """
@@ -300,8 +411,13 @@ class ConfigManager:
             if "analysis_prompts" not in self.config:
                 self.config["analysis_prompts"] = {}
                 
-            self.config["analysis_prompts"][prompt_type] = prompt
-            self._save_config()
+            prompts = self.config["analysis_prompts"]
+            if prompts.get(prompt_type) != prompt:
+                prompts[prompt_type] = prompt
+                # A new default can change the fallback for every type
+                self._prompt_cache.clear()
+                self._mark_dirty()
+                
             return True
             
         except Exception as e:
@@ -314,27 +430,29 @@ def main():
     # Initialize config manager
     config_manager = ConfigManager()
     
-    # Set configuration values
-    config_manager.set_config("telegram", "api_id", "YOUR_API_ID")
-    config_manager.set_config("telegram", "api_hash", "YOUR_API_HASH")
-    config_manager.set_config("telegram", "bot_token", "YOUR_BOT_TOKEN")
+    # Apply all changes with a single configuration write
+    with config_manager.batch():
+        # Set configuration values
+        config_manager.set_config("telegram", "api_id", "YOUR_API_ID")
+        config_manager.set_config("telegram", "api_hash", "YOUR_API_HASH")
+        config_manager.set_config("telegram", "bot_token", "YOUR_BOT_TOKEN")
     
-    # Add channels with descriptions
-    config_manager.add_channel("techcrunch", "Technology news and startup updates")
-    config_manager.add_channel("financenews", "Financial market analysis and updates")
-    config_manager.add_channel("worldevents", "Global news and current events")
+        # Add channels with descriptions
+        config_manager.add_channel("techcrunch", "Technology news and startup updates")
+        config_manager.add_channel("financenews", "Financial market analysis and updates")
+        config_manager.add_channel("worldevents", "Global news and current events")
     
-    # Add subscribers
-    config_manager.add_subscriber("USER_ID_1")
-    config_manager.add_subscriber("USER_ID_2")
+        # Add subscribers
+        config_manager.add_subscriber("USER_ID_1")
+        config_manager.add_subscriber("USER_ID_2")
     
-    # Set a custom analysis prompt
-    custom_prompt = (
-        "Analyze these messages with a focus on identifying key trends and patterns. "
-        "Highlight important information that would be valuable for users interested in "
-        "staying informed about developments in technology, finance, and global events."
-    )
-    config_manager.set_analysis_prompt("custom", custom_prompt)
+        # Set a custom analysis prompt
+        custom_prompt = (
+            "Analyze these messages with a focus on identifying key trends and patterns. "
+            "Highlight important information that would be valuable for users interested in "
+            "staying informed about developments in technology, finance, and global events."
+        )
+        config_manager.set_analysis_prompt("custom", custom_prompt)
     
     # Display current configuration
     full_config = config_manager.get_config()
@@ -0,0 +1,81 @@
+import json
+import os
+import stat
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library
+    orjson = None
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON bytes.
+    
+    Args:
+        obj: Object to serialize; dictionary keys need not be strings
+        indent: Indent the output by two spaces instead of writing it compactly
+        
+    Returns:
+        Encoded JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """
+    Deserialize UTF-8 JSON bytes.
+    
+    Args:
+        data: Encoded JSON document
+        
+    Returns:
+        Deserialized object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_file(path: str, obj: Any, indent: bool = False):
+    """
+    Write an object as JSON to a file, replacing it atomically.
+    
+    The data goes to a temporary file in the same directory first, so a crash never
+    leaves a truncated file. The replaced file keeps its permissions; a new file gets
+    the same permissions as one created with open().
+    
+    Args:
+        path: Path of the file to write
+        obj: Object to serialize
+        indent: Indent the output by two spaces instead of writing it compactly
+    """
+    data = dumps(obj, indent)
+    tmp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+    
+    # Created with mode 0666 so the kernel applies the umask, as it does for open()
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            
+        # An existing file keeps its permissions
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+            
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
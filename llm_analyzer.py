@@ -1,12 +1,84 @@
+import asyncio
 import logging
 import json
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import base64
+import io
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import random
+import re
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from PIL import Image
+from functools import lru_cache
+from urllib.parse import quote
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
+from json_utils import dumps, loads
+
+try:
+    import httpx
+except ImportError:  # Fall back to the requests session
+    httpx = None
+
+# Transport failures worth retrying, for whichever HTTP client is in use
+_RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+if httpx is not None:
+    _RETRYABLE_ERRORS += (httpx.TransportError,)
+
+# Section headers in the model's reply, e.g. "**摘要**" followed by its text
+_SECTION_RE = re.compile(r'\*\*\s*(摘要|内容)\s*\*\*(.*?)(?=\*\*\s*(?:摘要|内容)\s*\*\*|\Z)', re.DOTALL)
+
+# A non-empty line with surrounding whitespace stripped
+_LINE_RE = re.compile(r'^\s*(\S.*?)\s*$', re.MULTILINE)
+
+# How each message is presented to the model, and the values used for missing fields
+MSG_TEMPLATE = "Channel: {channel_title}\nDate: {date}\nMessage: {text}"
+_MSG_DEFAULTS = {"channel_title": "Unknown", "date": "Unknown", "text": ""}
+
+# Prompt appended after the messages when no custom analysis prompt is given
+_DEFAULT_PROMPT = (
+    "Analyze the above messages from different Telegram channels."
+    "Please provide a summary, extracting valuable information, trends, and insights."
+    "Include the most important of these, taking into account the context and focus of each channel."
+    "In \"summary\" is the core summary of all the content of all the channel, and needs to reflect the most important information. In \"content\", you need to output the content according to the type of message, such as \"I. --- Natural Disasters ---\" and \"II. --- Geopolitics & International Relations ---\""
+    "Reply in Cheinese."
+    #"After your normal analysis, please include a JSON response at the end of your message with the following format: ```json {\"summary\": \"the most important information\", \"content\": [\"First content\", \"Second content\", \"Third content\"]} ```\n"
+    "Note: I want you to extract valuable information, not analyze the topics of individual channels. You don't need to give a comment on these messages in the <summary>. In the summary, you only need to output the important information. Please control the number of messages you output in the summary by selecting only the more important ones to display!\n"
+    "Note: The content should be as complete as possible with the information you previously output, and use markdown formatting."
+    "\n\nResponse format: \n**摘要**\n<summary>\n**内容**\n**<title>**:\n <summary>: <content>"
+)
+
+# Prompt for combining the summaries of separately analyzed message chunks
+_MERGE_PROMPT = (
+    "The following are summaries of consecutive batches of messages from Telegram channels."
+    "Merge them into a single summary that keeps only the most important information and removes duplicates."
+    "Reply in Chinese with the merged summary text only.\n\n"
+)
+
+
+@lru_cache(maxsize=4)
+def _encode_file_cached(path: str, size: int, mtime_ns: int) -> str:
+    """
+    Base64-encode a file, memoized by path, size and modification time so a
+    changed file is re-read. Images are sent up to 4 MB, about 5.3 MB once
+    encoded, so only a few entries are kept.
+    """
+    # Encode in chunks so the raw file is never held in memory alongside its encoding;
+    # the chunk size is a multiple of 3, so no padding appears mid-stream
+    encoded = bytearray()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(57 * 1024)
+            if not chunk:
+                break
+            encoded += base64.b64encode(chunk)
+            
+    return encoded.decode('ascii')
 
 class LLMAnalyzer:
     def __init__(
@@ -14,7 +86,10 @@ class LLMAnalyzer:
         api_key: str, 
         base_url: str = "https://api.openai.com/v1",
         model: str = "gpt-4-vision-preview",
-        max_tokens: int = 1000
+        max_tokens: int = 1000,
+        max_concurrency: int = 4,
+        keep_resized_images: bool = True,
+        image_base_url: Optional[str] = None
     ):
         """
         Initialize the LLM Analyzer.
@@ -24,13 +99,68 @@ class LLMAnalyzer:
             base_url: Base URL for the API (default OpenAI, change for proxies or other providers)
             model: LLM model to use
             max_tokens: Maximum tokens for response
+            max_concurrency: Maximum number of concurrent analyze_messages_async requests
+            keep_resized_images: Also save resized images to disk so later runs can reuse them
+            image_base_url: Public URL under which the media files are served by file name;
+                when set, images are sent as URLs instead of inline base64
         """
         self.api_key = api_key
         self.base_url = base_url
         self.model = model
         self.max_tokens = max_tokens
+        self.keep_resized_images = keep_resized_images
+        self.image_base_url = image_base_url.rstrip("/") if image_base_url else None
+        self.use_inline_images = self.image_base_url is None
         self.logger = logging.getLogger(__name__)
         
+        # Reuse connections across calls and retries (retries are handled in _call_api_with_retry)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        })
+        
+        # Chat completions go over HTTP/2 when httpx and h2 are installed, so
+        # concurrent chunk analyses share one multiplexed connection
+        self.http = None
+        if httpx is not None:
+            try:
+                self.http = httpx.Client(
+                    http2=True,
+                    timeout=60.0,
+                    limits=httpx.Limits(max_keepalive_connections=8),
+                    headers={
+                        "Content-Type": "application/json",
+                        "Authorization": f"Bearer {api_key}"
+                    }
+                )
+            except ImportError:
+                self.logger.debug("h2 is not installed, using HTTP/1.1 for API calls")
+        self._http_version_logged = False
+        
+        # Limits in-flight async analyses; a thread semaphore works across event loops
+        self._request_slots = threading.BoundedSemaphore(max_concurrency)
+        
+        # Exponentially weighted share of recent requests that hit a rate limit
+        self._rate_limit_ewma = 0.0
+        
+        # Photos referenced by messages but missing on disk, over the analyzer's lifetime
+        self._missing_media = 0
+        self._stats_lock = threading.Lock()
+        
+        # Rendered channel information blocks, keyed by the description items
+        self._channel_context_cache = {}
+        
+        # Prepares the images of one request in parallel; Pillow releases the
+        # GIL while decoding, resampling and encoding
+        self._image_pool = ThreadPoolExecutor(
+            max_workers=min(8, os.cpu_count() or 1),
+            thread_name_prefix="image-prep"
+        )
+        
     def _encode_image(self, image_path: str) -> Optional[str]:
         """
         Encode an image to base64.
@@ -42,41 +172,27 @@ class LLMAnalyzer:
             Base64 encoded image or None if failed
         """
         try:
-            with open(image_path, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode('utf-8')
+            st = os.stat(image_path)
+            return _encode_file_cached(image_path, st.st_size, st.st_mtime_ns)
         except Exception as e:
-            self.logger.error(f"Error encoding image {image_path}: {str(e)}")
+            self.logger.error("Error encoding image %s: %s", image_path, e)
             return None
             
-    def _resize_image_if_needed(self, image_path: str, max_size: int = 4000000) -> str:
+    def _resize_image_bytes(self, image_path: str, file_size: int, max_size: int, quality: int) -> bytes:
         """
-        Resize an image if it exceeds the maximum size.
+        Downscale an image and re-encode it as JPEG in memory.
         
         Args:
             image_path: Path to the image
-            max_size: Maximum file size in bytes
+            file_size: Size of the original file in bytes
+            max_size: Maximum encoded size in bytes
+            quality: Initial JPEG quality (capped at 95; higher values only grow the file)
             
         Returns:
-            Path to the resized image (or original if not resized)
+            JPEG data of the resized image
         """
-        try:
-            file_size = os.path.getsize(image_path)
-            
-            if file_size <= max_size:
-                return image_path
-                
-            # Check if this image has already been resized
-            resized_path = f"{image_path}_resized.jpg"
-            if os.path.exists(resized_path):
-                if os.path.getsize(resized_path) <= max_size:
-                    return resized_path
-            
-            # Resize the image with PIL
-            from PIL import Image
-            import io
-            
-            # Open the image and get its dimensions
-            img = Image.open(image_path)
+        # Resize the image with PIL; the context manager closes the file as soon as we are done
+        with Image.open(image_path) as img:
             width, height = img.size
             
             # Calculate scaling factor based on target file size
@@ -84,38 +200,223 @@ class LLMAnalyzer:
             new_width = int(width * scale_factor)
             new_height = int(height * scale_factor)
             
-            # Resize the image
-            resized_img = img.resize((new_width, new_height), Image.LANCZOS)
+            # Let libjpeg downscale during decode (1/2, 1/4, 1/8), then resample
+            # only the smaller image; thumbnail keeps the aspect ratio
+            img.draft("RGB", (new_width, new_height))
+            img.thumbnail((new_width, new_height), Image.LANCZOS)
             
-            # Save with progressively lower quality until size requirement is met
-            quality = 85
-            while quality >= 60:  # Don't go below quality 60
-                resized_path = f"{image_path}_resized.jpg"
-                resized_img.save(resized_path, "JPEG", quality=quality)
+            # Pick the quality with fast in-memory probes, then do a single optimized save
+            quality = self._choose_jpeg_quality(img, max_size, min(quality, 95))
+            buffer = io.BytesIO()
+            img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+            
+            if buffer.tell() > max_size and quality > 60:
+                # The interpolated quality overshot; fall back to the floor
+                quality = 60
+                buffer = io.BytesIO()
+                img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
                 
-                new_size = os.path.getsize(resized_path)
-                if new_size <= max_size:
-                    break
-                    
-                quality -= 10
+        self.logger.info("Resized image from %d to %d bytes (quality: %d)", file_size, buffer.tell(), quality)
+        return buffer.getvalue()
+    
+    def _fit_image(self, image_path: str, max_size: int, quality: int, save_copy: bool) -> Tuple[str, Optional[bytes]]:
+        """
+        Find or produce a version of an image that fits within the maximum size.
+        
+        An existing "<path>_resized.jpg" copy is reused when it fits. Otherwise the
+        image is resized in memory and, if save_copy is set, written to that path.
+        
+        Args:
+            image_path: Path to the image
+            max_size: Maximum file size in bytes
+            quality: Initial JPEG quality for resizing
+            save_copy: Write a newly resized image next to the original
+            
+        Returns:
+            Tuple of (path, data): data is None when the file at path already fits;
+            otherwise it holds the resized JPEG, and path is its saved copy or the original
+        """
+        file_size = os.stat(image_path).st_size
+        if file_size <= max_size:
+            return image_path, None
+            
+        # Check if this image has already been resized; always stat the copy, since
+        # cleanup may have deleted it since the last call
+        resized_path = f"{image_path}_resized.jpg"
+        try:
+            if os.stat(resized_path).st_size <= max_size:
+                return resized_path, None
+        except FileNotFoundError:
+            pass
+        
+        data = self._resize_image_bytes(image_path, file_size, max_size, quality)
+        
+        if save_copy:
+            try:
+                with open(resized_path, "wb") as f:
+                    f.write(data)
+                return resized_path, data
+            except OSError as e:
+                self.logger.warning("Could not save resized image %s: %s", resized_path, e)
                 
-            self.logger.info(f"Resized image from {file_size} to {os.path.getsize(resized_path)} bytes (quality: {quality})")
-            return resized_path
+        return image_path, data
+    
+    def _prepare_image(self, image_path: str, max_size: int = 4000000, quality: int = 85) -> Optional[str]:
+        """
+        Resize an image if it exceeds the maximum size and encode it to base64.
+        
+        A resized image is encoded straight from memory. When keep_resized_images
+        is set it is also written next to the original as "<path>_resized.jpg" so
+        later runs can reuse it instead of resizing again.
+        
+        Args:
+            image_path: Path to the image
+            max_size: Maximum file size in bytes
+            quality: Initial JPEG quality for resizing
             
+        Returns:
+            Base64 encoded image or None if failed
+        """
+        try:
+            path, data = self._fit_image(image_path, max_size, quality, self.keep_resized_images)
         except Exception as e:
-            self.logger.error(f"Error resizing image {image_path}: {str(e)}")
-            return image_path  # Return original if resize failed
+            self.logger.error("Error resizing image %s: %s", image_path, e)
+            return self._encode_image(image_path)  # Send the original if resize failed
+            
+        if data is not None:
+            return base64.b64encode(data).decode('ascii')
+        return self._encode_image(path)
+    
+    def _image_url(self, image_path: str, max_size: int = 4000000, quality: int = 85) -> Optional[str]:
+        """
+        Get the URL the model should fetch an image from.
+        
+        With inline images this is a base64 data URL. Otherwise the image (or its
+        resized copy) is referenced by file name under image_base_url.
+        
+        Args:
+            image_path: Path to the image
+            max_size: Maximum file size in bytes
+            quality: Initial JPEG quality for resizing
+            
+        Returns:
+            Image URL or None if the image could not be prepared
+        """
+        if not self.use_inline_images:
+            try:
+                path, data = self._fit_image(image_path, max_size, quality, True)
+            except Exception as e:
+                self.logger.error("Error resizing image %s: %s", image_path, e)
+            else:
+                # A resized image that could not be saved is not reachable by URL
+                if data is None or path != image_path:
+                    return f"{self.image_base_url}/{quote(os.path.basename(path))}"
+                    
+            # Fall back to sending the image inline
+            
+        encoded_image = self._prepare_image(image_path, max_size, quality)
+        if encoded_image:
+            return f"data:image/jpeg;base64,{encoded_image}"
+        return None
+    
+    def _choose_jpeg_quality(self, img, max_size: int, max_quality: int, min_quality: int = 60) -> int:
+        """
+        Estimate the highest JPEG quality that fits within max_size.
+        
+        Probes the two ends of the range in memory (without optimize, which
+        only makes the final file smaller) and interpolates between them.
+        
+        Args:
+            img: PIL image to encode
+            max_size: Maximum file size in bytes
+            max_quality: Highest quality to consider
+            min_quality: Lowest quality to consider
+            
+        Returns:
+            Chosen JPEG quality
+        """
+        def probe(quality: int) -> int:
+            buffer = io.BytesIO()
+            img.save(buffer, "JPEG", quality=quality)
+            return buffer.tell()
+            
+        size_high = probe(max_quality)
+        if size_high <= max_size or max_quality <= min_quality:
+            return max_quality
+            
+        size_low = probe(min_quality)
+        if size_low >= max_size:
+            return min_quality
+            
+        # File size grows roughly linearly with quality over this range
+        ratio = (max_size - size_low) / (size_high - size_low)
+        return min_quality + int((max_quality - min_quality) * ratio)
+    
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        """
+        Parse a Retry-After header given either as seconds or as an HTTP date.
+        
+        Args:
+            value: Header value
+            
+        Returns:
+            Seconds to wait, or None if the header is missing or invalid
+        """
+        if not value:
+            return None
+            
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+            
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+            
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
     
-    def _call_api_with_retry(self, url, headers, payload, max_retries=3, base_delay=2):
-        """Make API call with exponential backoff retry logic."""
+    def _backoff_delay(self, attempt: int, base_delay: float, max_delay: float) -> float:
+        """Capped exponential backoff with jitter over the upper half of the window."""
+        delay = min(max_delay, base_delay * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+    
+    def _call_api_with_retry(self, url, headers, payload, max_retries=3, base_delay=2, max_delay=300):
+        """Make API call with capped exponential backoff retry logic."""
+        # Serialize once; retries resend the same bytes (the session sets the JSON content type)
+        body = dumps(payload)
+        
         for attempt in range(max_retries):
+            # Back off before sending when recent calls were mostly rate limited
+            if self._rate_limit_ewma > 0.5:
+                throttle = random.uniform(0, min(max_delay, base_delay) * self._rate_limit_ewma)
+                self.logger.info("Recent requests were rate limited, throttling for %.2f seconds.", throttle)
+                time.sleep(throttle)
+                
             try:
-                response = requests.post(url, headers=headers, json=payload, timeout=60)
+                # Client headers already carry auth; headers only adds or overrides
+                if self.http is not None:
+                    response = self.http.post(url, headers=headers, content=body)
+                    if not self._http_version_logged:
+                        self._http_version_logged = True
+                        self.logger.info("API connection uses %s", response.http_version)
+                else:
+                    response = self.session.post(url, headers=headers, data=body, timeout=60)
+                
+                # Track how often we are rate limited (exponentially weighted)
+                rate_limited = response.status_code == 429
+                self._rate_limit_ewma = 0.8 * self._rate_limit_ewma + (0.2 if rate_limited else 0.0)
                 
                 # Handle rate limits (status code 429)
-                if response.status_code == 429:
-                    retry_after = int(response.headers.get('Retry-After', base_delay * (2 ** attempt)))
-                    self.logger.warning(f"Rate limited. Retrying after {retry_after} seconds.")
+                if rate_limited:
+                    retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                    if retry_after is None:
+                        retry_after = self._backoff_delay(attempt, base_delay, max_delay)
+                    retry_after = min(retry_after, max_delay)
+                    self.logger.warning("Rate limited. Retrying after %.2f seconds.", retry_after)
                     time.sleep(retry_after)
                     continue
                     
@@ -125,33 +426,57 @@ class LLMAnalyzer:
                     
                 # Handle other errors
                 if attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                    self.logger.warning(f"API request failed with status {response.status_code}. Retrying after {delay:.2f} seconds.")
+                    delay = self._backoff_delay(attempt, base_delay, max_delay)
+                    self.logger.warning("API request failed with status %s. Retrying after %.2f seconds.", response.status_code, delay)
                     time.sleep(delay)
                 else:
-                    self.logger.error(f"API request failed after {max_retries} attempts. Status: {response.status_code}, Response: {response.text}")
+                    self.logger.error("API request failed after %d attempts. Status: %s, Response: %s", max_retries, response.status_code, response.text)
                     return response
                     
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            except _RETRYABLE_ERRORS as e:
                 if attempt < max_retries - 1:
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
-                    self.logger.warning(f"Connection error: {str(e)}. Retrying after {delay:.2f} seconds.")
+                    delay = self._backoff_delay(attempt, base_delay, max_delay)
+                    self.logger.warning("Connection error: %s. Retrying after %.2f seconds.", e, delay)
                     time.sleep(delay)
                 else:
-                    self.logger.error(f"Connection failed after {max_retries} attempts: {str(e)}")
+                    self.logger.error("Connection failed after %d attempts: %s", max_retries, e)
                     raise
         
         # If we get here, all retries failed
         raise Exception(f"API request failed after {max_retries} attempts")
 
-    def analyze_messages(
-        self, 
-        messages: List[Dict[str, Any]], 
+    def _channel_context(self, channel_descriptions: Dict[str, str]) -> str:
+        """
+        Render the channel information block, reusing it while the descriptions are unchanged.
+        
+        Args:
+            channel_descriptions: Dictionary mapping channel_id to description
+            
+        Returns:
+            Channel information text
+        """
+        key = tuple(channel_descriptions.items())
+        channel_context = self._channel_context_cache.get(key)
+        if channel_context is None:
+            channel_context = "Channel Information:\n" + "".join(
+                f"- Channel ID {channel_id}: {description}\n"
+                for channel_id, description in channel_descriptions.items()
+            )
+            # Descriptions rarely change; drop stale renderings instead of growing without bound
+            if len(self._channel_context_cache) >= 8:
+                self._channel_context_cache.clear()
+            self._channel_context_cache[key] = channel_context
+            
+        return channel_context
+    
+    def _build_payload(
+        self,
+        messages: List[Dict[str, Any]],
         channel_descriptions: Dict[str, str] = None,
         analysis_prompt: str = None
     ) -> Dict[str, Any]:
         """
-        Analyze messages using the LLM API.
+        Build the chat completion request body for a list of messages.
         
         Args:
             messages: List of message dictionaries
@@ -159,11 +484,8 @@ class LLMAnalyzer:
             analysis_prompt: Custom prompt for analysis
             
         Returns:
-            Dictionary containing analysis results
+            Request payload dictionary
         """
-        if not messages:
-            return {"summary": "No messages to analyze", "key_points": []}
-            
         # Prepare message content
         content = []
         
@@ -175,77 +497,111 @@ class LLMAnalyzer:
         
         # Add context about channels
         if channel_descriptions:
-            channel_context = "Channel Information:\n"
-            for channel_id, description in channel_descriptions.items():
-                channel_context += f"- Channel ID {channel_id}: {description}\n"
-            
+            channel_context = self._channel_context(channel_descriptions)
             content.append({
                 "type": "text",
                 "text": channel_context
             })
         
-        # Add messages
-        for msg in messages:
-            message_text = f"Channel: {msg.get('channel_title', 'Unknown')}\n"
-            message_text += f"Date: {msg.get('date', 'Unknown')}\n"
-            message_text += f"Message: {msg.get('text', '')}"
+        # Start preparing all photos up front so they are resized (and encoded)
+        # in parallel while the text blocks are assembled. Photos whose file is
+        # gone (e.g. removed by cleanup) are sent as text only
+        image_futures = {}
+        missing_media = set()
+        for index, msg in enumerate(messages):
+            if msg.get('media_path') and msg.get('media_type') == 'photo':
+                if os.path.isfile(msg['media_path']):
+                    image_futures[index] = self._image_pool.submit(self._image_url, msg['media_path'])
+                else:
+                    missing_media.add(index)
+                    
+        if missing_media:
+            with self._stats_lock:
+                self._missing_media += len(missing_media)
+            self.logger.warning("%d photos are no longer on disk, sending their messages as text", len(missing_media))
+        
+        # Add messages. Consecutive text-only messages share one text block;
+        # a message with a photo keeps its own block so the image follows it
+        pending_texts = []
+        for index, msg in enumerate(messages):
+            message_text = MSG_TEMPLATE.format_map(ChainMap(msg, _MSG_DEFAULTS))
+            
+            if index not in image_futures:
+                if index in missing_media:
+                    message_text += "\n[image unavailable]"
+                pending_texts.append(message_text)
+                continue
+            
+            if pending_texts:
+                content.append({"type": "text", "text": "\n\n".join(pending_texts)})
+                pending_texts = []
             
             content.append({
                 "type": "text",
                 "text": message_text
             })
             
-            # Add image if available
-            if msg.get('media_path') and msg.get('media_type') == 'photo':
-                try:
-                    # Resize image if needed to meet API requirements
-                    resized_image_path = self._resize_image_if_needed(msg['media_path'])
-                    encoded_image = self._encode_image(resized_image_path)
-                    
-                    if encoded_image:
-                        content.append({
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{encoded_image}"
-                            }
-                        })
-                except Exception as e:
-                    self.logger.error(f"Error processing image: {str(e)}")
+            # Add image
+            try:
+                image_url = image_futures[index].result()
+                
+                if image_url:
+                    content.append({
+                        "type": "image_url",
+                        "image_url": {
+                            "url": image_url
+                        }
+                    })
+            except Exception as e:
+                self.logger.error("Error processing image: %s", e)
+        
+        if pending_texts:
+            content.append({"type": "text", "text": "\n\n".join(pending_texts)})
+        
+        # Prepare default prompt if none provided
+        if analysis_prompt is None:
+            analysis_prompt = _DEFAULT_PROMPT
+        content.append({"type": "text","text": str(analysis_prompt)})
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            # The content carries base64 images; log only the head of it
+            self.logger.debug("Request content: %s", json.dumps(content, ensure_ascii=False, default=str)[:4096])
+
+        payload = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            "max_tokens": self.max_tokens
+        }
+        return payload
+    
+    def analyze_messages(
+        self, 
+        messages: List[Dict[str, Any]], 
+        channel_descriptions: Dict[str, str] = None,
+        analysis_prompt: str = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze messages using the LLM API.
         
+        Args:
+            messages: List of message dictionaries
+            channel_descriptions: Optional dictionary mapping channel_id to description
+            analysis_prompt: Custom prompt for analysis
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        if not messages:
+            return {"summary": "No messages to analyze", "key_points": []}
+            
         # Make API request
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            
-            # Prepare default prompt if none provided
-            if analysis_prompt is None:
-                analysis_prompt = (
-                    "Analyze the above messages from different Telegram channels."
-                    "Please provide a summary, extracting valuable information, trends, and insights."
-                    "Include the most important of these, taking into account the context and focus of each channel."
-                    "In \"summary\" is the core summary of all the content of all the channel, and needs to reflect the most important information. In \"content\", you need to output the content according to the type of message, such as \"I. --- Natural Disasters ---\" and \"II. --- Geopolitics & International Relations ---\""
-                    "Reply in Cheinese."
-                    #"After your normal analysis, please include a JSON response at the end of your message with the following format: ```json {\"summary\": \"the most important information\", \"content\": [\"First content\", \"Second content\", \"Third content\"]} ```\n"
-                    "Note: I want you to extract valuable information, not analyze the topics of individual channels. You don't need to give a comment on these messages in the <summary>. In the summary, you only need to output the important information. Please control the number of messages you output in the summary by selecting only the more important ones to display!\n"
-                    "Note: The content should be as complete as possible with the information you previously output, and use markdown formatting."
-                    "\n\nResponse format: \n**摘要**\n<summary>\n**内容**\n**<title>**:\n <summary>: <content>"
-                    )
-            content.append({"type": "text","text": str(analysis_prompt)})
-            
-            self.logger.info(content)
-
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": content
-                    }
-                ],
-                "max_tokens": self.max_tokens
-            }
+            payload = self._build_payload(messages, channel_descriptions, analysis_prompt)
 
             '''
             response = requests.post(
@@ -253,7 +609,7 @@ class LLMAnalyzer:
                 headers=headers,
                 json=payload
             )'''
-            response = self._call_api_with_retry(f"{self.base_url}/chat/completions", headers, payload, 10, 120)
+            response = self._call_api_with_retry(f"{self.base_url}/chat/completions", None, payload, 10, 120)
             
             if response.status_code == 200:
                 result = response.json()
@@ -265,64 +621,230 @@ class LLMAnalyzer:
                 analysis_result = self._parse_analysis(analysis_text)
                 return analysis_result
             else:
-                self.logger.error(f"API request failed with status {response.status_code}: {response.text}")
+                self.logger.error("API request failed with status %s: %s", response.status_code, response.text)
                 return {"error": f"API request failed: {response.text}"}
                 
         except Exception as e:
-            self.logger.error(f"Error analyzing messages: {str(e)}")
+            self.logger.error("Error analyzing messages: %s", e)
             return {"error": f"Analysis failed: {str(e)}"}
     
-    def _parse_analysis(self, analysis_text: str) -> Dict[str, Any]:
+    async def analyze_messages_async(
+        self, 
+        messages: List[Dict[str, Any]], 
+        channel_descriptions: Dict[str, str] = None,
+        analysis_prompt: str = None
+    ) -> Dict[str, Any]:
         """
-        Parse the analysis text into structured data, with support for JSON output.
+        Analyze messages without blocking the event loop.
+        
+        The request runs in a worker thread, so several calls can be awaited
+        together (e.g. with asyncio.gather); at most max_concurrency run at once.
         
         Args:
-            analysis_text: Raw text from LLM response
+            messages: List of message dictionaries
+            channel_descriptions: Optional dictionary mapping channel_id to description
+            analysis_prompt: Custom prompt for analysis
             
         Returns:
-            Structured analysis result
+            Dictionary containing analysis results
         """
-        result = {"summary": "", "contents": []}
+        return await asyncio.to_thread(
+            self._analyze_messages_limited, messages, channel_descriptions, analysis_prompt
+        )
     
-        # Split into sections
-        sections = analysis_text.split("**")
-        
-        summary_found = False
-        content_found = False
-        
-        for i, section in enumerate(sections):
-            if section.strip() == "摘要" and i+1 < len(sections):
-                # Next section is the summary content
-                result["summary"] = sections[i+1].strip()
-                summary_found = True
-            
-            if section.strip() == "内容" and i+1 < len(sections):
-                # Everything after this is content
-                content_found = True
-                content_text = "**".join(sections[i+1:])
+    def _analyze_messages_limited(self, messages, channel_descriptions, analysis_prompt):
+        """Run analyze_messages while holding a concurrency slot."""
+        with self._request_slots:
+            return self.analyze_messages(messages, channel_descriptions, analysis_prompt)
+    
+    def merge_analyses(self, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine the results of separately analyzed message chunks.
+        
+        Contents are concatenated in order and the summaries are merged by the
+        model; if that call fails, the summaries are joined as they are.
+        
+        Args:
+            analyses: Analysis results of consecutive message chunks
+            
+        Returns:
+            Merged analysis result
+        """
+        if len(analyses) == 1:
+            return analyses[0]
+            
+        summaries = [analysis["summary"] for analysis in analyses if analysis.get("summary")]
+        merged = {
+            "summary": "\n\n".join(summaries),
+            "contents": [line for analysis in analyses for line in analysis.get("contents", [])]
+        }
+        if len(summaries) < 2:
+            return merged
+            
+        prompt = _MERGE_PROMPT + "\n\n".join(
+            f"{number}. {summary}" for number, summary in enumerate(summaries, 1)
+        )
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.max_tokens
+        }
+        try:
+            with self._request_slots:
+                response = self._call_api_with_retry(f"{self.base_url}/chat/completions", None, payload, 10, 120)
+            if response.status_code == 200:
+                merged["summary"] = response.json()["choices"][0]["message"]["content"].strip()
+            else:
+                self.logger.warning("Summary merge failed with status %s, joining summaries", response.status_code)
+        except Exception as e:
+            self.logger.warning("Summary merge failed, joining summaries: %s", e)
+            
+        return merged
+    
+    def analyze_messages_batch(
+        self,
+        message_batches: List[List[Dict[str, Any]]],
+        channel_descriptions: Dict[str, str] = None,
+        analysis_prompt: str = None,
+        poll_interval: int = 30,
+        max_poll_interval: int = 600,
+        timeout: int = 86400
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several message lists through the OpenAI Batch API.
+        
+        Batch requests are billed at a discount but may take up to 24 hours,
+        so this is only suitable for non-interactive, scheduled analysis.
+        
+        Args:
+            message_batches: List of message lists, each analyzed separately
+            channel_descriptions: Optional dictionary mapping channel_id to description
+            analysis_prompt: Custom prompt for analysis
+            poll_interval: Initial delay between status checks (in seconds)
+            max_poll_interval: Maximum delay between status checks (in seconds)
+            timeout: Maximum time to wait for the batch (in seconds)
+            
+        Returns:
+            List of analysis results in the same order as message_batches
+        """
+        results = [None] * len(message_batches)
+        
+        # One NDJSON request line per non-empty message list
+        lines = []
+        for index, messages in enumerate(message_batches):
+            if not messages:
+                results[index] = {"summary": "No messages to analyze", "key_points": []}
+                continue
                 
-                # Parse content into distinct points
-                content_sections = []
-                current_section = None
+            lines.append(dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_payload(messages, channel_descriptions, analysis_prompt)
+            }))
+            
+        if not lines:
+            return results
+            
+        try:
+            # Upload the requests file (multipart, so drop the session's JSON content type)
+            upload = self.session.post(
+                f"{self.base_url}/files",
+                headers={"Content-Type": None},
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", b"\n".join(lines), "application/jsonl")},
+                timeout=120
+            )
+            upload.raise_for_status()
+            
+            created = self.session.post(
+                f"{self.base_url}/batches",
+                json={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h"
+                },
+                timeout=60
+            )
+            created.raise_for_status()
+            batch_id = created.json()["id"]
+            self.logger.info("Submitted batch %s with %d requests", batch_id, len(lines))
+            
+            # Poll with exponential backoff until the batch finishes
+            delay = poll_interval
+            deadline = time.time() + timeout
+            while True:
+                status = self.session.get(f"{self.base_url}/batches/{batch_id}", timeout=60)
+                status.raise_for_status()
+                batch = status.json()
+                
+                if batch["status"] == "completed":
+                    break
+                if batch["status"] in ("failed", "expired", "cancelled"):
+                    raise Exception(f"Batch {batch_id} ended with status {batch['status']}")
+                if time.time() + delay > deadline:
+                    raise Exception(f"Batch {batch_id} did not complete within {timeout} seconds")
+                    
+                time.sleep(delay)
+                delay = min(delay * 2, max_poll_interval)
                 
-                for line in content_text.split('\n'):
-                    line = line.strip()
-                    if not line:
+            # Download the output and match responses back by custom_id
+            output_file_id = batch.get("output_file_id")
+            if output_file_id:
+                output = self.session.get(f"{self.base_url}/files/{output_file_id}/content", timeout=120)
+                output.raise_for_status()
+                
+                for line in output.content.splitlines():
+                    if not line.strip():
                         continue
+                        
+                    item = loads(line)
+                    index = int(item["custom_id"])
+                    response = item.get("response") or {}
                     
-                    # Check if line is a section header
-                    if line.startswith('**') and line.endswith('**'):
-                        current_section = line
-                        content_sections.append(current_section)
-                    elif line.startswith('* ') or line.startswith('- '):
-                        # This is a bullet point, add as is
-                        content_sections.append(line)
+                    if response.get("status_code") == 200:
+                        analysis_text = response["body"]["choices"][0]["message"]["content"]
+                        results[index] = self._parse_analysis(analysis_text)
                     else:
-                        # Regular content line
-                        content_sections.append(line)
-                
-                result["contents"] = content_sections
-                break
+                        error = item.get("error") or response.get("body")
+                        self.logger.error("Batch request %d failed: %s", index, error)
+                        results[index] = {"error": f"Batch request failed: {error}"}
+                        
+        except Exception as e:
+            self.logger.error("Error running batch analysis: %s", e)
+            return [
+                result if result is not None else {"error": f"Batch analysis failed: {str(e)}"}
+                for result in results
+            ]
+            
+        return [
+            result if result is not None else {"error": "No result returned for batch request"}
+            for result in results
+        ]
+    
+    def _parse_analysis(self, analysis_text: str) -> Dict[str, Any]:
+        """
+        Parse the analysis text into structured data, with support for JSON output.
+        
+        Args:
+            analysis_text: Raw text from LLM response
+            
+        Returns:
+            Structured analysis result
+        """
+        result = {"summary": "", "contents": []}
+        
+        # Extract the "摘要" (summary) and "内容" (content) sections in one scan
+        sections = dict(_SECTION_RE.findall(analysis_text))
+        summary_found = "摘要" in sections
+        content_found = "内容" in sections
+        
+        if summary_found:
+            result["summary"] = sections["摘要"].strip()
+            
+        if content_found:
+            # Every non-empty line (headers, bullets and text) becomes one content item
+            result["contents"] = _LINE_RE.findall(sections["内容"])
         
         # Fallback if structured parsing failed
         if not summary_found and not content_found:
@@ -369,8 +891,8 @@ def main():
     ) # TODO 缺失analysis_prompt
     
     # Save analysis
-    with open("analysis_results.json", "w", encoding="utf-8") as f:
-        json.dump(analysis, f, ensure_ascii=False, indent=2)
+    with open("analysis_results.json", "wb") as f:
+        f.write(dumps(analysis, indent=True))
     
     print("Analysis completed and saved to analysis_results.json")
 
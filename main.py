@@ -1,13 +1,14 @@
 import asyncio
 import logging
 import os
-import json
 from datetime import datetime
 import argparse
+import threading
 # from typing import Dict, Any, List, Optional
 
 # Import modules
 from config_manager import ConfigManager
+from json_utils import dump_file
 from telegram_collector import TelegramCollector
 from llm_analyzer import LLMAnalyzer
 from telegram_bot import TelegramBot
@@ -35,6 +36,10 @@ class Application:
         
         # Initialize scheduler
         self.scheduler = TaskScheduler()
+        
+        # Long-lived event loop for scheduled runs, started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
     
     def _setup_logging(self):
         """Set up logging configuration."""
@@ -48,6 +53,9 @@ class Application:
         # Set Telethon to a higher log level to reduce verbosity
         logging.getLogger('telethon').setLevel(logging.WARNING)
         
+        # Pillow logs every decoded chunk at DEBUG; keep only warnings
+        logging.getLogger('PIL').setLevel(logging.WARNING)
+        
         logging.basicConfig(
             level=logging.INFO,
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -76,21 +84,28 @@ class Application:
                 api_key=llm_config.get("api_key"),
                 base_url=llm_config.get("base_url"),
                 model=llm_config.get("model"),
-                max_tokens=llm_config.get("max_tokens")
+                max_tokens=llm_config.get("max_tokens"),
+                max_concurrency=llm_config.get("max_concurrency", 4),
+                image_base_url=llm_config.get("image_base_url")
             )
             
             # Initialize Telegram bot
             bot_config = telegram_config.get("bot", {})
-            self.bot = TelegramBot(bot_config.get("token"))
+            self.bot = TelegramBot(bot_config.get("token"), self.config_manager)
             
             self.logger.info("All components initialized")
             
         except Exception as e:
-            self.logger.error(f"Error initializing components: {str(e)}")
+            self.logger.error("Error initializing components: %s", e)
             raise
     
-    async def collect_and_analyze(self):
-        """Collect and analyze messages from Telegram channels."""
+    async def collect_and_analyze(self, use_batch_api: bool = False):
+        """
+        Collect and analyze messages from Telegram channels.
+        
+        Args:
+            use_batch_api: Analyze through the provider's Batch API (cheaper, slower)
+        """
         try:
             # Get channels
             channels = self.config_manager.get_channels()
@@ -112,7 +127,7 @@ class Application:
                 return
             
             # Collect messages
-            self.logger.info(f"Collecting messages from {len(channels)} channels")
+            self.logger.info("Collecting messages from %d channels", len(channels))
             messages = await self.collector.get_new_messages_without_duplication(
                 channel_usernames=channels,
                 limit=80
@@ -125,25 +140,50 @@ class Application:
             output_dir = os.path.join(os.getcwd(), "data")
             os.makedirs(output_dir, exist_ok=True)
             output_file = os.path.join(output_dir, f"messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            self.collector.save_messages_to_json(messages, output_file)
+            await asyncio.to_thread(self.collector.save_messages_to_json, messages, output_file)
             
             if not messages:
                 self.logger.info("No new messages collected")
                 return
                 
-            # Analyze messages
-            self.logger.info(f"Analyzing {len(messages)} messages")
+            # Analyze messages in chunks so each request stays small; chunks run
+            # concurrently (bounded by the analyzer) and their results are merged
+            llm_config = self.config_manager.get_config("llm") or {}
+            chunk_size = max(1, llm_config.get("chunk_size", 20))
+            chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+            
+            self.logger.info("Analyzing %d messages in %d chunks", len(messages), len(chunks))
             analysis_prompt = self.config_manager.get_analysis_prompt()
-            analysis = self.analyzer.analyze_messages(
-                messages=messages,
-                channel_descriptions=channel_descriptions,
-                # analysis_prompt=analysis_prompt TODO
-            )
+            if use_batch_api:
+                results = await asyncio.to_thread(
+                    self.analyzer.analyze_messages_batch,
+                    chunks,
+                    channel_descriptions
+                )
+            else:
+                results = await asyncio.gather(*[
+                    self.analyzer.analyze_messages_async(
+                        messages=chunk,
+                        channel_descriptions=channel_descriptions,
+                        # analysis_prompt=analysis_prompt TODO
+                    )
+                    for chunk in chunks
+                ], return_exceptions=True)
             
-            if "error" in analysis:
-                self.logger.error(f"Analysis error: {analysis['error']}")
+            analyses = []
+            for index, result in enumerate(results):
+                if isinstance(result, BaseException):
+                    result = {"error": str(result)}
+                if "error" in result:
+                    self.logger.error("Analysis error in chunk %d: %s", index + 1, result['error'])
+                else:
+                    analyses.append(result)
+                    
+            if not analyses:
                 return
                 
+            analysis = await asyncio.to_thread(self.analyzer.merge_analyses, analyses)
+                
             # Add source information
             channel_stats = {}
             for msg in messages:
@@ -166,19 +206,19 @@ class Application:
             os.makedirs(analysis_dir, exist_ok=True)
             analysis_file = os.path.join(analysis_dir, f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
             
-            with open(analysis_file, 'w', encoding='utf-8') as f:
-                json.dump(analysis, f, ensure_ascii=False, indent=2)
-                
-            self.logger.info(f"Analysis saved to {analysis_file}")
+            # Replaced atomically, off the event loop like the message and tracking saves
+            await asyncio.to_thread(dump_file, analysis_file, analysis, True)
+            
+            self.logger.info("Analysis saved to %s", analysis_file)
             
             # Distribute analysis to subscribers
             subscribers = self.config_manager.get_subscribers()
             if subscribers:
-                self.logger.info(f"Sending analysis to {len(subscribers)} subscribers")
+                self.logger.info("Sending analysis to %d subscribers", len(subscribers))
                 await self.bot.send_analysis_to_users(analysis, subscribers)
             
         except Exception as e:
-            self.logger.error(f"Error in collect_and_analyze: {str(e)}")
+            self.logger.error("Error in collect_and_analyze: %s", e)
     
     def schedule_tasks(self):
         """Schedule regular tasks."""
@@ -202,15 +242,39 @@ class Application:
                 interval=cleanup_interval
             )
             
-            self.logger.info(f"Scheduled collection and analysis task with interval {collection_interval}")
-            self.logger.info(f"Scheduled cleanup task with interval {cleanup_interval}")
+            self.logger.info("Scheduled collection and analysis task with interval %s", collection_interval)
+            self.logger.info("Scheduled cleanup task with interval %s", cleanup_interval)
             
         except Exception as e:
-            self.logger.error(f"Error scheduling tasks: {str(e)}")
+            self.logger.error("Error scheduling tasks: %s", e)
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Get the background event loop used for scheduled runs, starting it if needed.
+        
+        Keeping one loop alive across runs lets clients and connections bound to it be reused.
+        
+        Returns:
+            The running background event loop
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="collect-loop",
+                    daemon=True
+                ).start()
+            return self._loop
     
     def _run_collect_and_analyze(self):
         """Run the collect_and_analyze coroutine."""
-        asyncio.run(self.collect_and_analyze())
+        scheduler_config = self.config_manager.get_config("scheduler") or {}
+        future = asyncio.run_coroutine_threadsafe(
+            self.collect_and_analyze(use_batch_api=scheduler_config.get("use_batch_api", False)),
+            self._get_loop()
+        )
+        future.result()
     
     async def start(self):
         """Start the application."""
@@ -230,7 +294,7 @@ class Application:
             self.logger.info("Application started")
             
         except Exception as e:
-            self.logger.error(f"Error starting application: {str(e)}")
+            self.logger.error("Error starting application: %s", e)
             raise
     
     async def stop(self):
@@ -240,6 +304,12 @@ class Application:
             self.logger.info("Stopping scheduler")
             self.scheduler.stop()
             
+            # Stop the background event loop used by scheduled runs
+            with self._loop_lock:
+                if self._loop is not None:
+                    self._loop.call_soon_threadsafe(self._loop.stop)
+                    self._loop = None
+            
             # Stop the bot
             self.logger.info("Stopping Telegram bot")
             await self.bot.stop()
@@ -247,7 +317,7 @@ class Application:
             self.logger.info("Application stopped")
             
         except Exception as e:
-            self.logger.error(f"Error stopping application: {str(e)}")
+            self.logger.error("Error stopping application: %s", e)
     
     def _run_cleanup(self):
         """Run the cleanup operation."""
@@ -264,10 +334,10 @@ class Application:
             # Run cleanup
             results = cleanup_manager.cleanup_all(folder_configs)
             
-            self.logger.info(f"Cleanup completed: {results}")
+            self.logger.info("Cleanup completed: %s", results)
             
         except Exception as e:
-            self.logger.error(f"Error during cleanup operation: {str(e)}")
+            self.logger.error("Error during cleanup operation: %s", e)
 
 
 async def main():
@@ -289,9 +359,10 @@ async def main():
         api_hash = input("Enter Telegram API Hash: ")
         bot_token = input("Enter Telegram Bot Token: ")
         
-        app.config_manager.set_config("telegram", "api_id", api_id)
-        app.config_manager.set_config("telegram", "api_hash", api_hash)
-        app.config_manager.set_config("telegram", "bot_token", bot_token)
+        with app.config_manager.batch():
+            app.config_manager.set_config("telegram", "api_id", api_id)
+            app.config_manager.set_config("telegram", "api_hash", api_hash)
+            app.config_manager.set_config("telegram", "bot_token", bot_token)
         
         # LLM configuration
         api_key = input("Enter LLM API Key: ")
@@ -299,8 +370,9 @@ async def main():
         if not base_url:
             base_url = "https://api.openai.com/v1"
         
-        app.config_manager.set_config("llm", "api_key", api_key)
-        app.config_manager.set_config("llm", "base_url", base_url)
+        with app.config_manager.batch():
+            app.config_manager.set_config("llm", "api_key", api_key)
+            app.config_manager.set_config("llm", "base_url", base_url)
         
         # Add channels
         while True:
@@ -2,23 +2,71 @@ import asyncio
 import logging
 import os
 import json
+import sqlite3
 from datetime import datetime, timedelta
-import schedule
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Callable, Optional
+from json_utils import dumps
+
+
+def _to_iso(timestamp: Optional[float]) -> Optional[str]:
+    """Format an epoch timestamp as a local ISO 8601 string, passing None through."""
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+def _from_iso(value: Optional[str]) -> Optional[float]:
+    """Parse a local ISO 8601 string written by _to_iso back to an epoch timestamp."""
+    return datetime.fromisoformat(value).timestamp() if value is not None else None
+
 
 class TaskScheduler:
-    def __init__(self):
-        """Initialize the task scheduler."""
+    def __init__(self, flush_interval: float = 30.0, max_workers: int = 8):
+        """
+        Initialize the task scheduler.
+        
+        Args:
+            flush_interval: Seconds between writes of changed task state to disk
+            max_workers: Number of threads that run synchronous task functions
+        """
         self.logger = logging.getLogger(__name__)
         self.tasks = {}
         self.running = False
         self.thread = None
         
+        # Event loop driving the task timers; it runs in self.thread while started
+        self.loop = None
+        self._timers = {}
+        
+        # Per-task status entries, replaced whenever a task's times change; updated
+        # from the scheduler thread and read from the caller's, so kept under a lock
+        self._status = {}
+        self._status_lock = threading.Lock()
+        self.max_workers = max_workers
+        
+        # Tasks whose run state changed since the last flush
+        self.flush_interval = flush_interval
+        self._dirty = set()
+        
         # Create schedules directory if it doesn't exist
         self.schedules_dir = os.path.join(os.getcwd(), "schedules")
         os.makedirs(self.schedules_dir, exist_ok=True)
+        
+        # Task state lives in one SQLite database; WAL keeps each upsert cheap.
+        # Tasks are saved from the scheduler thread and managed from the caller's
+        # thread, so the connection is shared under a lock
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(self.schedules_dir, "tasks.db"),
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "task_id TEXT PRIMARY KEY, interval TEXT, kwargs_json TEXT, last_run TEXT, next_run TEXT)"
+        )
     
     def add_task(self, task_id: str, task_func: Callable, interval: str, **kwargs):
         """
@@ -26,22 +74,35 @@ class TaskScheduler:
         
         Args:
             task_id: Unique identifier for the task
-            task_func: Function to execute
+            task_func: Function or coroutine function to execute
             interval: Schedule interval (e.g., "1h", "30m", "daily")
             **kwargs: Arguments to pass to the task function
         """
-        self.tasks[task_id] = {
+        task = {
             "function": task_func,
             "interval": interval,
+            "next_deadline": self._deadline_function(interval),
             "kwargs": kwargs,
+            "is_async": asyncio.iscoroutinefunction(task_func),
             "last_run": None,
             "next_run": None
         }
+        task["run"] = self._make_runner(task_id, task)
+        self.tasks[task_id] = task
         
-        self.logger.info(f"Added task {task_id} with interval {interval}")
+        self.logger.info("Added task %s with interval %s", task_id, interval)
         
+        # Resume the schedule saved by a previous run, unless the interval changed
+        next_run = None
+        saved = self._load_task_state(task_id)
+        if saved is not None and saved[0] == interval:
+            task["last_run"] = saved[1]
+            next_run = saved[2]
+            self.logger.info("Restored state of task %s, next run at %s", task_id, _to_iso(next_run))
+            
         # Schedule the task
-        self._schedule_task(task_id)
+        self._schedule_task(task_id, next_run)
+        self._update_status(task_id)
         
         # Save task configuration
         self._save_task_config(task_id)
@@ -54,90 +115,277 @@ class TaskScheduler:
             task_id: Task identifier
         """
         if task_id in self.tasks:
-            schedule.clear(task_id)
             del self.tasks[task_id]
-            self.logger.info(f"Removed task {task_id}")
+            with self._status_lock:
+                self._status.pop(task_id, None)
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self._cancel_timer, task_id)
+            self.logger.info("Removed task %s", task_id)
+            
+            # Remove task configuration
+            self._dirty.discard(task_id)
+            with self._db_lock:
+                self._db.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+    
+    def _parse_interval(self, interval: str) -> Optional[float]:
+        """
+        Convert an interval to its period in seconds.
+        
+        Args:
+            interval: Schedule interval (e.g., "1h", "30m", "daily")
             
-            # Remove task configuration file
-            config_path = os.path.join(self.schedules_dir, f"{task_id}.json")
-            if os.path.exists(config_path):
-                os.remove(config_path)
+        Returns:
+            Period in seconds, or None if the interval format is invalid
+        """
+        if interval.endswith('m'):
+            return int(interval[:-1]) * 60.0
+        elif interval.endswith('h'):
+            return int(interval[:-1]) * 3600.0
+        elif interval == 'daily':
+            return 86400.0
+        elif interval == 'hourly':
+            return 3600.0
+        return None
     
-    def _schedule_task(self, task_id: str):
+    def _deadline_function(self, interval: str) -> Optional[Callable[[], float]]:
         """
-        Schedule a task based on its interval.
+        Build a function that returns a task's next run time for an interval.
+        
+        The interval is resolved here once, so computing a deadline takes no branches.
+        
+        Args:
+            interval: Schedule interval (e.g., "1h", "30m", "daily")
+            
+        Returns:
+            Function returning the next run as an epoch timestamp, or None if the
+            interval format is invalid
+        """
+        period = self._parse_interval(interval)
+        if period is None:
+            return None
+            
+        if interval == 'daily':
+            # Daily tasks run at midnight rather than a day after the last run
+            def next_midnight() -> float:
+                today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                return (today + timedelta(days=1)).timestamp()
+            return next_midnight
+            
+        return lambda: time.time() + period
+    
+    def _schedule_task(self, task_id: str, next_run: Optional[float] = None):
+        """
+        Schedule the next run of a task based on its interval.
         
         Args:
             task_id: Task identifier
+            next_run: Epoch time of the next run; computed from the interval if None
         """
         if task_id not in self.tasks:
             return
             
         task = self.tasks[task_id]
-        interval = task["interval"]
+        if task["next_deadline"] is None:
+            self.logger.error("Invalid interval format for task %s: %s", task_id, task['interval'])
+            return
+            
+        # Set next run time; a time already passed makes the task run as soon as it is armed
+        task["next_run"] = next_run if next_run is not None else task["next_deadline"]()
+        
+        self._update_status(task_id)
+        
+        # Arm the timer on the scheduler loop; tasks added before start() are armed by start()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._arm_timer, task_id, task["next_run"])
+    
+    def _arm_timer(self, task_id: str, deadline: float):
+        """
+        Start the timer for a task's next run. Runs on the scheduler loop.
+        
+        Args:
+            task_id: Task identifier
+            deadline: Epoch time at which the task should run
+        """
+        self._cancel_timer(task_id)
+        if task_id not in self.tasks:
+            return
+            
+        delay = deadline - time.time()
+        if delay <= 0:
+            # Already due; run now instead of going through the timer queue
+            self._fire(task_id)
+        else:
+            self._timers[task_id] = self.loop.call_later(delay, self._fire, task_id)
+    
+    def _cancel_timer(self, task_id: str):
+        """
+        Cancel the pending timer of a task, if any. Runs on the scheduler loop.
+        
+        Args:
+            task_id: Task identifier
+        """
+        timer = self._timers.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+    
+    def _fire(self, task_id: str):
+        """
+        Start a due task. Runs on the scheduler loop.
+        
+        Coroutine functions run as tasks on the loop itself; plain functions run
+        in a worker thread. The next run is scheduled once the task finishes, so
+        runs never overlap.
+        
+        Args:
+            task_id: Task identifier
+        """
+        self._timers.pop(task_id, None)
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+            
+        if task["is_async"]:
+            future = self.loop.create_task(task["run"]())
+        else:
+            future = self.loop.run_in_executor(None, task["run"])
+        future.add_done_callback(lambda _: self._task_done(task_id))
+    
+    def _make_runner(self, task_id: str, task: Dict[str, Any]) -> Callable:
+        """
+        Build the callable that executes a task and records when it ran.
+        
+        The task entry, function and kwargs are bound once here, so a run does
+        no lookups in self.tasks.
+        
+        Args:
+            task_id: Task identifier
+            task: Task entry in self.tasks
+            
+        Returns:
+            Coroutine function for async tasks, plain function otherwise
+        """
+        func = task["function"]
+        kwargs = task["kwargs"]
+        logger = self.logger
         
-        # Create a wrapper function to update task execution times
-        def task_wrapper():
+        if task["is_async"]:
+            async def run_async():
+                try:
+                    # Update last run time
+                    task["last_run"] = time.time()
+                    
+                    # Await the task coroutine with kwargs
+                    await func(**kwargs)
+                    
+                    logger.info("Task %s executed successfully", task_id)
+                    
+                except Exception as e:
+                    logger.error("Error executing task %s: %s", task_id, e)
+                    
+            return run_async
+            
+        def run():
             try:
                 # Update last run time
-                self.tasks[task_id]["last_run"] = datetime.now().isoformat()
+                task["last_run"] = time.time()
                 
                 # Execute the task function with kwargs
-                task["function"](**task["kwargs"])
+                func(**kwargs)
                 
-                # Update next run time based on current schedule
-                self._update_next_run_time(task_id)
-                
-                # Save updated task configuration
-                self._save_task_config(task_id)
-                
-                self.logger.info(f"Task {task_id} executed successfully")
+                logger.info("Task %s executed successfully", task_id)
                 
             except Exception as e:
-                self.logger.error(f"Error executing task {task_id}: {str(e)}")
+                logger.error("Error executing task %s: %s", task_id, e)
+                
+        return run
+    
+    def _task_done(self, task_id: str):
+        """
+        Schedule the next run of a finished task and mark its state for the next flush.
         
-        # Schedule based on interval format
-        if interval.endswith('m'):
-            minutes = int(interval[:-1])
-            schedule.every(minutes).minutes.do(task_wrapper).tag(task_id)
-            next_run = datetime.now() + timedelta(minutes=minutes)
-        elif interval.endswith('h'):
-            hours = int(interval[:-1])
-            schedule.every(hours).hours.do(task_wrapper).tag(task_id)
-            next_run = datetime.now() + timedelta(hours=hours)
-        elif interval == 'daily':
-            schedule.every().day.at("00:00").do(task_wrapper).tag(task_id)
-            next_run = datetime.now().replace(hour=0, minute=0, second=0) + timedelta(days=1)
-        elif interval == 'hourly':
-            schedule.every().hour.do(task_wrapper).tag(task_id)
-            next_run = datetime.now().replace(minute=0, second=0) + timedelta(hours=1)
-        else:
-            self.logger.error(f"Invalid interval format for task {task_id}: {interval}")
+        Args:
+            task_id: Task identifier
+        """
+        if self.running:
+            self._schedule_task(task_id)
+        self._update_status(task_id)
+        self._dirty.add(task_id)
+    
+    def _flush_periodically(self):
+        """Write changed task state and re-arm the flush timer. Runs on the scheduler loop."""
+        self._flush_dirty()
+        if self.running:
+            self.loop.call_later(self.flush_interval, self._flush_periodically)
+    
+    def _flush_dirty(self):
+        """Save all tasks whose state changed since the last flush in one transaction."""
+        dirty, self._dirty = self._dirty, set()
+        task_ids = [task_id for task_id in dirty if task_id in self.tasks]
+        if not task_ids:
             return
             
-        # Set next run time
-        self.tasks[task_id]["next_run"] = next_run.isoformat()
-        
-    def _update_next_run_time(self, task_id: str):
+        try:
+            with self._db_lock:
+                self._db.execute("BEGIN")
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO tasks (task_id, interval, kwargs_json, last_run, next_run) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        [self._task_row(task_id) for task_id in task_ids]
+                    )
+                    self._db.execute("COMMIT")
+                except Exception:
+                    self._db.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            self.logger.error("Error saving task state: %s", e)
+            self._dirty.update(task_ids)
+    
+    def _task_row(self, task_id: str) -> tuple:
         """
-        Update the next run time for a task.
+        Build the database row for a task.
         
         Args:
             task_id: Task identifier
+            
+        Returns:
+            Tuple of (task_id, interval, kwargs_json, last_run, next_run)
         """
-        if task_id not in self.tasks:
-            return
+        task = self.tasks[task_id]
+        return (
+            task_id,
+            task["interval"],
+            dumps(task["kwargs"]).decode('utf-8'),
+            _to_iso(task["last_run"]),
+            _to_iso(task["next_run"])
+        )
+    
+    def _load_task_state(self, task_id: str) -> Optional[tuple]:
+        """
+        Load the saved state of a task from the task database.
+        
+        Args:
+            task_id: Task identifier
             
-        for job in schedule.get_jobs():
-            if task_id in job.tags:
-                next_run = job.next_run
-                if next_run:
-                    self.tasks[task_id]["next_run"] = next_run.isoformat()
-                break
+        Returns:
+            Tuple of (interval, last_run, next_run) with epoch times, or None if
+            the task was never saved or its row could not be read
+        """
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT interval, last_run, next_run FROM tasks WHERE task_id = ?", (task_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            return row[0], _from_iso(row[1]), _from_iso(row[2])
+        except Exception as e:
+            self.logger.error("Error loading state of task %s: %s", task_id, e)
+            return None
     
     def _save_task_config(self, task_id: str):
         """
-        Save task configuration to file.
+        Save task configuration to the task database.
         
         Args:
             task_id: Task identifier
@@ -145,69 +393,93 @@ class TaskScheduler:
         if task_id not in self.tasks:
             return
             
-        task = self.tasks[task_id]
-        
-        # Create a serializable configuration
-        config = {
-            "interval": task["interval"],
-            "kwargs": task["kwargs"],
-            "last_run": task["last_run"],
-            "next_run": task["next_run"]
-        }
-        
-        # Save to file
-        config_path = os.path.join(self.schedules_dir, f"{task_id}.json")
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-    
-    def _load_task_configs(self):
-        """Load task configurations from files."""
-        try:
-            config_files = [f for f in os.listdir(self.schedules_dir) if f.endswith('.json')]
-            
-            for config_file in config_files:
-                task_id = config_file.replace('.json', '')
-                
-                # Skip if task already exists
-                if task_id in self.tasks:
-                    continue
-                    
-                config_path = os.path.join(self.schedules_dir, config_file)
-                
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    
-                self.logger.info(f"Loaded task configuration for {task_id}")
-                
-        except Exception as e:
-            self.logger.error(f"Error loading task configurations: {str(e)}")
+        # Upsert the serializable configuration
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tasks (task_id, interval, kwargs_json, last_run, next_run) "
+                "VALUES (?, ?, ?, ?, ?)",
+                self._task_row(task_id)
+            )
     
     def start(self):
-        """Start the scheduler in a separate thread."""
+        """Start the scheduler loop in a separate thread."""
         if self.running:
             return
             
         self.running = True
+        self.loop = asyncio.new_event_loop()
+        
+        # The loop thread only schedules; synchronous task bodies run on a reused worker pool
+        self.loop.set_default_executor(
+            ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scheduler-task")
+        )
         self.thread = threading.Thread(target=self._run_scheduler)
         self.thread.daemon = True
         self.thread.start()
         
+        # Arm the tasks added before the scheduler started, keeping their restored run times
+        for task_id in list(self.tasks):
+            self._schedule_task(task_id, self.tasks[task_id]["next_run"])
+            
+        self.loop.call_soon_threadsafe(self._flush_periodically)
+        
         self.logger.info("Scheduler started")
     
     def stop(self):
-        """Stop the scheduler."""
+        """Stop the scheduler, cancelling running coroutine tasks."""
         self.running = False
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
         if self.thread:
-            self.thread.join(timeout=5)
+            # The loop wakes immediately; only cancelled coroutines are awaited
+            self.thread.join()
             self.thread = None
+        self.loop = None
+        
+        # Save whatever changed since the last periodic flush
+        self._flush_dirty()
             
         self.logger.info("Scheduler stopped")
     
     def _run_scheduler(self):
-        """Run the scheduler loop."""
-        while self.running:
-            schedule.run_pending()
-            time.sleep(1)
+        """
+        Run the scheduler loop until stop() is called.
+        
+        The loop sleeps until the earliest task timer is due instead of polling.
+        """
+        loop = self.loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            
+            # Cancel coroutine tasks still in flight and let them unwind
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        finally:
+            self._timers.clear()
+            loop.close()
+    
+    def _update_status(self, task_id: str):
+        """
+        Refresh the cached status entry of a task.
+        
+        Args:
+            task_id: Task identifier
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return
+            
+        status = {
+            "interval": task["interval"],
+            "last_run": _to_iso(task["last_run"]),
+            "next_run": _to_iso(task["next_run"])
+        }
+        with self._status_lock:
+            self._status[task_id] = status
     
     def get_task_status(self, task_id: str = None) -> Dict[str, Any]:
         """
@@ -217,27 +489,16 @@ class TaskScheduler:
             task_id: Optional task identifier, if None returns all tasks
             
         Returns:
-            Dictionary with task status information
-        """
-        if task_id and task_id in self.tasks:
-            task = self.tasks[task_id]
-            return {
-                "task_id": task_id,
-                "interval": task["interval"],
-                "last_run": task["last_run"],
-                "next_run": task["next_run"]
-            }
-        elif task_id:
-            return {"error": f"Task {task_id} not found"}
-        else:
-            result = {}
-            for tid, task in self.tasks.items():
-                result[tid] = {
-                    "interval": task["interval"],
-                    "last_run": task["last_run"],
-                    "next_run": task["next_run"]
-                }
-            return result
+            Dictionary with task status information; for all tasks this is a
+            snapshot taken at the time of the call
+        """
+        with self._status_lock:
+            if task_id and task_id in self._status:
+                return {"task_id": task_id, **self._status[task_id]}
+            elif task_id:
+                return {"error": f"Task {task_id} not found"}
+            else:
+                return dict(self._status)
 
 
 def sample_task(name: str = "Task"):
@@ -262,7 +523,7 @@ def main():
         time.sleep(60)
         status = scheduler.get_task_status()
         print("Task status:")
-        print(json.dumps(status, indent=2))
+        print(json.dumps(dict(status), indent=2))
         
         # Keep running for demo
         print("Scheduler running. Press Ctrl+C to stop.")
@@ -1,33 +1,153 @@
 import asyncio
+import functools
 import logging
-import json
-from typing import Dict, Any, List, Optional
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from typing import Dict, Any, List, Optional, Tuple
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 import os
 from datetime import datetime
 import html
 import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config_manager import ConfigManager
+from json_utils import dumps, loads
+
+# Markdown constructs converted or stripped when formatting messages
+_RE_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_RE_BOLD_UNDER = re.compile(r'__(.*?)__')
+_RE_ITALIC_UNDER = re.compile(r'_(.*?)_')
+_RE_ITALIC_STAR = re.compile(r'\*((?!\*).+?)\*')
+_RE_ITALIC_SINGLE_UNDER = re.compile(r'_((?!_).+?)_')
+_RE_STRIKE = re.compile(r'~~(.*?)~~')
+_RE_CODE = re.compile(r'`(.*?)`')
+_RE_BULLET = re.compile(r'^- ', re.MULTILINE)
+_RE_BULLET_PREFIX = re.compile(r'^(?:\* ?|- )')
+
+# Bold, italic, bullet or HTML-special character, matched in one left-to-right scan
+_RE_TELEGRAM_FMT = re.compile(r'\*\*(.*?)\*\*|_(.*?)_|^- |[&<>"\']', re.MULTILINE)
+_RE_SENTENCE = re.compile(r'.*?(?:[.!?。！？]+\s*|$)', re.DOTALL)
+_HTML_ENTITIES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'}
+
+# Broadcast summary heading; its title is bolded with an entity (offsets count UTF-16 code units)
+_BROADCAST_ICON = "📊 "
+_BROADCAST_TITLE = "New Content Summary"
+_BROADCAST_HEADER = f"{_BROADCAST_ICON}{_BROADCAST_TITLE}\n\n"
+_BROADCAST_ENTITIES = (
+    MessageEntity(
+        MessageEntity.BOLD,
+        offset=len(_BROADCAST_ICON.encode('utf-16-le')) // 2,
+        length=len(_BROADCAST_TITLE.encode('utf-16-le')) // 2
+    ),
+)
+_RE_HTML_TAG = re.compile(r'<.*?>')
+_RE_MD_SYM = re.compile(r'[*_~`]')
+
+@functools.lru_cache(maxsize=128)
+def _summary_markup(analysis_id: str) -> InlineKeyboardMarkup:
+    """Keyboard with the details and sources buttons for an analysis."""
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("View Details", callback_data=f"details_{analysis_id}"),
+            InlineKeyboardButton("View Sources", callback_data=f"sources_{analysis_id}")
+        ]
+    ])
+
+@functools.lru_cache(maxsize=128)
+def _back_markup(analysis_id: str) -> InlineKeyboardMarkup:
+    """Keyboard with a single button returning to an analysis summary."""
+    return InlineKeyboardMarkup([[InlineKeyboardButton("Back to Summary", callback_data=f"back_{analysis_id}")]])
+
+@functools.lru_cache(maxsize=1024)
+def _page_item_html(item: str) -> str:
+    """HTML-escaped detail page item without its leading Markdown bullet."""
+    # Remove "* ", "*" or "- " prefix; this fixes the "• * " duplication issue
+    clean_item = _RE_BULLET_PREFIX.sub('', item, count=1)
+    return html.escape(clean_item).replace('\n', '<br>')
 
 class TelegramBot:
-    def __init__(self, token: str):
+    def __init__(self, token: str, config_manager: Optional[ConfigManager] = None):
         """Initialize the Telegram bot."""
         self.token = token
         self.application = Application.builder().token(token).build()
         self.logger = logging.getLogger(__name__)
         
+        # Configuration shared with the rest of the application, used for subscriptions
+        self.config_manager = config_manager or ConfigManager()
+        
         # Register handlers
         self.register_handlers()
         
         # Store for analysis results
         self.analysis_store = {}
         
-        # Initialize user-specific pagination data storage
-        self.pagination_data = {}
+        # Parsed analysis files keyed by ID, with the file mtime they were read at (LRU)
+        self._analysis_cache = OrderedDict()
+        self._analysis_cache_size = 32
+        self._analysis_cache_lock = threading.Lock()
+        
+        # Bounded pool for reading, parsing and paginating analysis files off the event loop
+        self._io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bot-io")
+        
+        # Newest analysis file name, with the directory mtime it was listed at
+        self._latest_listing = None
+        
+        # Initialize user-specific pagination data storage, ordered from least to most recently used
+        self.pagination_data = OrderedDict()
         
         # Set session expiry (in seconds)
         self.pagination_session_expiry = 86400  # 24 hour
         
+        # Upper bound on pagination sessions held in memory; the least recently used
+        # are moved to the session database and restored from it when used again
+        self.pagination_max_sessions = 2000
+        
+        # Directory holding analysis results, created once here rather than on every store
+        self.analysis_dir = os.path.join(os.getcwd(), "analysis")
+        os.makedirs(self.analysis_dir, exist_ok=True)
+        
+        # Cold pagination sessions. Only the position is stored; pages are rebuilt from the
+        # analysis file. The database is only used from the event loop thread
+        sessions_dir = os.path.join(os.getcwd(), "sessions")
+        os.makedirs(sessions_dir, exist_ok=True)
+        self._session_db = sqlite3.connect(
+            os.path.join(sessions_dir, "pagination.db"),
+            check_same_thread=False
+        )
+        self._session_db.execute("PRAGMA journal_mode=WAL")
+        self._session_db.execute(
+            "CREATE TABLE IF NOT EXISTS pagination_sessions ("
+            "user_id INTEGER, analysis_id TEXT, current_page INTEGER, last_used REAL, "
+            "PRIMARY KEY (user_id, analysis_id))"
+        )
+        
+        # Callback data prefix -> handler taking (query, payload)
+        self._callback_handlers = {
+            "prev": functools.partial(self._handle_page_callback, step=-1),
+            "next": functools.partial(self._handle_page_callback, step=1),
+            "page": functools.partial(self._handle_page_callback, step=0),
+            "back": self._handle_back_callback,
+            "details": self._handle_details_callback,
+            "sources": self._handle_sources_callback
+        }
+        
+        # Cap on concurrent outgoing Telegram calls, kept below the ~30 messages/sec bot limit.
+        # One semaphore per event loop: handlers run on the bot's loop while broadcasts
+        # come from the collection loop, and a semaphore cannot be shared between loops
+        self._send_slots = weakref.WeakKeyDictionary()
+        self.max_concurrent_sends = 25
+        
+        # In-flight edit per (chat_id, message_id); a newer edit of the same message replaces it
+        self._pending_edits = {}
+        
+        # Background task sweeping expired pagination sessions
+        self._pagination_sweep_task = None
+        self.pagination_sweep_interval = 300
+        
     def register_handlers(self):
         """Register command and callback handlers."""
         self.application.add_handler(CommandHandler("start", self.start_command))
@@ -42,24 +162,23 @@ class TelegramBot:
         """Handle the /subscribe command."""
         user_id = str(update.effective_user.id)
         
-        # Import ConfigManager
-        from config_manager import ConfigManager
-        config_manager = ConfigManager()
-        
         # Add user to subscribers
-        if config_manager.add_subscriber(user_id):
-            await update.message.reply_text(
+        if self.config_manager.add_subscriber(user_id):
+            await self._reply(
+                update.message,
                 "✅ 您已成功订阅更新！"
                 "您将定期收到被监控频道的内容摘要。"
             )
         else:
-            await update.message.reply_text(
+            await self._reply(
+                update.message,
                 "您已经订阅了消息聚合。"
             )
         
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle the /start command."""
-        await update.message.reply_text(
+        await self._reply(
+            update.message,
             "👋 欢迎使用消息聚合器！\n\n"
             "目前我可以提供各种 Telegram 频道的内容摘要。\n\n"
             "Commands:\n"
@@ -69,7 +188,8 @@ class TelegramBot:
         
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle the /help command."""
-        await update.message.reply_text(
+        await self._reply(
+            update.message,
             "📚 消息聚合器 - 帮助\n\n"
             "该机器人汇总来自不同 Telegram 频道的内容，并提供简明摘要。\n\n"
             "Commands:\n"
@@ -81,10 +201,10 @@ class TelegramBot:
     async def latest_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle the /latest command."""
         try:
-            latest_analysis = self.get_latest_analysis()
+            latest_analysis = await self.get_latest_analysis()
             
             if not latest_analysis or "error" in latest_analysis:
-                await update.message.reply_text("No recent analysis available. Please try again later.")
+                await self._reply(update.message, "No recent analysis available. Please try again later.")
                 return
                 
             # Format and send the summary
@@ -92,7 +212,7 @@ class TelegramBot:
             
         except Exception as e:
             self.logger.error(f"Error in latest_command: {str(e)}")
-            await update.message.reply_text("An error occurred while retrieving the latest analysis.")
+            await self._reply(update.message, "An error occurred while retrieving the latest analysis.")
             
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle button callbacks."""
@@ -100,213 +220,207 @@ class TelegramBot:
         await query.answer()
         
         try:
-            data = query.data
-            
-            if data.startswith("prev_") or data.startswith("next_") or data.startswith("page_"):
-                # Extract pagination key
-                key_part = data.split("_", 1)[1]
-                
-                # Get user ID for multi-user support
-                user_id = query.from_user.id
-                
-                # Try both user-specific format and legacy format (for backward compatibility)
-                user_pagination_key = f"u{user_id}_{key_part}"
-                
-                # Check if this pagination session exists
-                if user_pagination_key in self.pagination_data:
-                    pagination_key = user_pagination_key
-                elif key_part in self.pagination_data:
-                    # Legacy key format support
-                    pagination_key = key_part
-                else:
-                    await query.edit_message_text("Session expired. Please try again.")
-                    return
-                
-                # Verify user ownership of this pagination session
-                session_data = self.pagination_data[pagination_key]
-                if 'user_id' in session_data and session_data['user_id'] != user_id:
-                    await query.answer("This session belongs to another user.", show_alert=True)
-                    return
-                
-                # Update session timestamp to extend expiry
-                from datetime import datetime
-                session_data['created_at'] = datetime.now().timestamp()
-                
-                # Update current page based on action
-                if data.startswith("prev_"):
-                    session_data['current_page'] -= 1
-                elif data.startswith("next_"):
-                    session_data['current_page'] += 1
-                
-                # Extract analysis_id from pagination_key
-                if "_details_" in pagination_key:
-                    analysis_id = pagination_key.split("_details_")[1]
-                else:
-                    # Fallback for other pagination types
-                    analysis_id = pagination_key.split("_")[-1]
-                
-                # Display the updated page
-                await self._display_content_page(query, pagination_key, analysis_id)
-
-            elif data.startswith("back_"):
-                # Handle "Back to Summary" button clicks
-                analysis_id = data.replace("back_", "")
-                self.logger.info(f"Returning to summary for analysis ID: {analysis_id}")
+            # Dispatch on the callback data prefix, e.g. "details_<analysis_id>"
+            action, _, payload = query.data.partition("_")
+            handler = self._callback_handlers.get(action)
+            if handler is not None:
+                await handler(query, payload)
                 
-                # Remove overly strict validation and instead focus on finding the analysis
-                analysis = self.get_analysis_by_id(analysis_id)
-                
-                if analysis:
-                    # Format summary
-                    summary = analysis.get("summary", "No summary available.")
-                    formatted_summary = html.escape(summary)
-                    
-                    # Create keyboard with buttons for details and sources
-                    keyboard = [
-                        [
-                            InlineKeyboardButton("View Details", callback_data=f"details_{analysis_id}"),
-                            InlineKeyboardButton("View Sources", callback_data=f"sources_{analysis_id}")
-                        ]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    # Edit message to show summary again, using HTML formatting
-                    await query.edit_message_text(
-                        f"📊 <b>Content Summary</b>\n\n{formatted_summary}",
-                        reply_markup=reply_markup,
-                        parse_mode="HTML"
-                    )
-                else:
-                    # Improved error message with actionable instructions
-                    self.logger.error(f"Analysis not found for ID: {analysis_id}")
-                    await query.edit_message_text(
-                        "Unable to retrieve the summary. Please use /latest to view the most recent analysis."
-                    )
-
-            elif data.startswith("details_"):
-                analysis_id = data.replace("details_", "")
-                analysis = self.get_analysis_by_id(analysis_id)
-                
-                if analysis:
-                    await self.send_analysis_details(query, analysis)
-                else:
-                    await query.edit_message_text("Analysis details not found.")
-                    
-            elif data.startswith("sources_"):
-                analysis_id = data.replace("sources_", "")
-                analysis = self.get_analysis_by_id(analysis_id)
-                
-                if analysis and "sources" in analysis:
-                    await self.send_analysis_sources(query, analysis)
-                else:
-                    await query.edit_message_text("Source information not available.")
-            
-            elif data.startswith("back_"):
-                # Handle "Back to Summary" button clicks
-                analysis_id = data.replace("back_", "")
-                analysis = self.get_analysis_by_id(analysis_id)
-                
-                if analysis:
-                    # Format summary
-                    summary = analysis.get("summary", "No summary available.")
-                    # Use HTML instead of Markdown for more reliable formatting
-                    formatted_summary = html.escape(summary)
-
-                    # Create keyboard with buttons for details and sources
-                    keyboard = [
-                        [
-                            InlineKeyboardButton("View Details", callback_data=f"details_{analysis_id}"),
-                            InlineKeyboardButton("View Sources", callback_data=f"sources_{analysis_id}")
-                        ]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-                    
-                    # Edit message to show summary again, using HTML formatting
-                    await query.edit_message_text(
-                        f"📊 <b>Content Summary</b>\n\n{formatted_summary}",
-                        reply_markup=reply_markup,
-                        parse_mode="HTML"
-                    )
-                else:
-                    await query.edit_message_text("Summary not found.")
-                    
         except Exception as e:
             self.logger.error(f"Error in button_callback: {str(e)}")
             # Provide a simple fallback response without formatting
-            await query.edit_message_text("An error occurred while processing your request. Please try again.")
+            await self._edit_message(query, "An error occurred while processing your request. Please try again.")
 
-    def _cleanup_expired_pagination_sessions(self):
-        """Remove expired pagination sessions to prevent memory leaks."""
-        try:
-            from datetime import datetime
-            current_time = datetime.now().timestamp()
-            expired_keys = []
-            
-            # Find expired sessions
-            for key, data in self.pagination_data.items():
-                if 'created_at' in data:
-                    if current_time - data['created_at'] > self.pagination_session_expiry:
-                        expired_keys.append(key)
-            
-            # Remove expired sessions
-            for key in expired_keys:
-                del self.pagination_data[key]
-                
-            if expired_keys:
-                self.logger.info(f"Cleaned up {len(expired_keys)} expired pagination sessions")
-        except Exception as e:
-            self.logger.error(f"Error cleaning up pagination sessions: {str(e)}")
-
-    def sanitize_markdown(self, text: str) -> str:
+    async def _handle_page_callback(self, query, analysis_id: str, step: int):
         """
-        Sanitize text for Markdown formatting by properly escaping special characters.
+        Move a pagination session by one page and redisplay it.
         
         Args:
-            text: Text to sanitize
-            
-        Returns:
-            Sanitized text safe for Markdown parsing
+            query: Callback query object
+            analysis_id: Analysis ID from the callback data
+            step: Page offset (-1 for previous, 1 for next, 0 to redisplay)
         """
-        if not text:
-            return ""
+        # Sessions are keyed per user, so one user's navigation never touches another's
+        pagination_key = (query.from_user.id, analysis_id)
+        session_data = self.pagination_data.get(pagination_key)
+        if session_data is None:
+            session_data = await self._restore_pagination_session(pagination_key)
+        if session_data is None:
+            await self._edit_message(query, "Session expired. Please try again.")
+            return
+        
+        # Update session timestamp to extend expiry
+        self._touch_pagination_session(pagination_key)
+        
+        # Update current page based on action; stale or repeated button presses
+        # must not move past either end
+        page = session_data['current_page']
+        session_data['current_page'] = max(0, min(page + step, len(session_data['pages']) - 1))
+        
+        # Display the updated page
+        await self._display_content_page(query, pagination_key)
+
+    async def _handle_back_callback(self, query, analysis_id: str):
+        """Handle "Back to Summary" button clicks."""
+        self.logger.info(f"Returning to summary for analysis ID: {analysis_id}")
+        
+        # Remove overly strict validation and instead focus on finding the analysis
+        analysis = await self.get_analysis_by_id(analysis_id)
+        
+        if analysis:
+            # Format summary (escaped once when the file was loaded)
+            formatted_summary = analysis.get("_summary_escaped")
+            if formatted_summary is None:
+                formatted_summary = html.escape(str(analysis.get("summary", "No summary available.")))
+            
+            # Create keyboard with buttons for details and sources
+            reply_markup = _summary_markup(analysis_id)
             
-        # Escape Markdown special characters with backslashes
-        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+            # Edit message to show summary again, using HTML formatting
+            await self._edit_message(
+                query,
+                f"📊 <b>Content Summary</b>\n\n{formatted_summary}",
+                reply_markup=reply_markup,
+                parse_mode="HTML"
+            )
+        else:
+            # Improved error message with actionable instructions
+            self.logger.error(f"Analysis not found for ID: {analysis_id}")
+            await self._edit_message(
+                query,
+                "Unable to retrieve the summary. Please use /latest to view the most recent analysis."
+            )
+
+    async def _handle_details_callback(self, query, analysis_id: str):
+        """Handle "View Details" button clicks."""
+        analysis = await self.get_analysis_by_id(analysis_id)
         
-        # Process the text to handle existing markdown-like syntax
-        result = ""
-        escape_next = False
+        if analysis:
+            await self.send_analysis_details(query, analysis)
+        else:
+            await self._edit_message(query, "Analysis details not found.")
+
+    async def _handle_sources_callback(self, query, analysis_id: str):
+        """Handle "View Sources" button clicks."""
+        analysis = await self.get_analysis_by_id(analysis_id)
         
-        for char in text:
-            if char in special_chars and not escape_next:
-                result += "\\" + char
-            else:
-                result += char
-            escape_next = char == "\\" and not escape_next
+        if analysis and "sources" in analysis:
+            await self.send_analysis_sources(query, analysis)
+        else:
+            await self._edit_message(query, "Source information not available.")
+
+    def _touch_pagination_session(self, pagination_key: Tuple[int, str]):
+        """Mark a pagination session as just used, keeping the sessions ordered by age."""
+        self.pagination_data[pagination_key]['created_at'] = time.monotonic()
+        self.pagination_data.move_to_end(pagination_key)
         
-        return result
+        # Move the least recently used sessions beyond the cap to the session database
+        evicted = []
+        while len(self.pagination_data) > self.pagination_max_sessions:
+            evicted.append(self.pagination_data.popitem(last=False))
+        if evicted:
+            self._spill_pagination_sessions(evicted)
 
-    def sanitize_markdown_v2(self, text: str) -> str:
+    def _spill_pagination_sessions(self, sessions: List[Tuple[Tuple[int, str], Dict[str, Any]]]):
         """
-        Sanitize text for MarkdownV2 formatting by escaping special characters.
+        Write pagination sessions to the session database.
         
         Args:
-            text: Text to sanitize
+            sessions: (pagination key, session data) pairs
+        """
+        try:
+            # Session timestamps are monotonic; store them as wall-clock time so they survive restarts
+            offset = time.time() - time.monotonic()
+            rows = [
+                (user_id, analysis_id, data['current_page'], data['created_at'] + offset)
+                for (user_id, analysis_id), data in sessions
+            ]
+            with self._session_db:
+                self._session_db.executemany(
+                    "INSERT OR REPLACE INTO pagination_sessions (user_id, analysis_id, current_page, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows
+                )
+        except Exception as e:
+            self.logger.error(f"Error saving pagination sessions: {str(e)}")
+
+    async def _restore_pagination_session(self, pagination_key: Tuple[int, str]) -> Optional[Dict[str, Any]]:
+        """
+        Bring a pagination session back from the session database.
+        
+        Args:
+            pagination_key: (user_id, analysis_id) of the session
             
         Returns:
-            Sanitized text safe for MarkdownV2 parsing
+            Restored session data, or None if there is no live session
         """
-        if not text:
-            return ""
+        try:
+            with self._session_db:
+                row = self._session_db.execute(
+                    "SELECT current_page, last_used FROM pagination_sessions WHERE user_id = ? AND analysis_id = ?",
+                    pagination_key
+                ).fetchone()
+                if row is None:
+                    return None
+                self._session_db.execute(
+                    "DELETE FROM pagination_sessions WHERE user_id = ? AND analysis_id = ?",
+                    pagination_key
+                )
+        except Exception as e:
+            self.logger.error(f"Error restoring pagination session: {str(e)}")
+            return None
             
-        # These characters must be escaped in MarkdownV2
-        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        
-        for char in special_chars:
-            text = text.replace(char, '\\' + char)
+        current_page, last_used = row
+        if time.time() - last_used > self.pagination_session_expiry:
+            return None
             
-        return text
-    
+        # Pages are shared with the cached analysis; a missing file (or fallback to another one) ends the session
+        analysis_id = pagination_key[1]
+        analysis = await self.get_analysis_by_id(analysis_id)
+        if not analysis or analysis.get("id") != analysis_id or not analysis.get("_pages"):
+            return None
+            
+        pages = analysis["_pages"]
+        session_data = {
+            'pages': pages,
+            'current_page': min(current_page, len(pages) - 1),
+            'created_at': last_used - (time.time() - time.monotonic())
+        }
+        self.pagination_data[pagination_key] = session_data
+        return session_data
+
+    def _cleanup_expired_pagination_sessions(self):
+        """Remove expired pagination sessions to prevent memory leaks."""
+        try:
+            current_time = time.monotonic()
+            expired_count = 0
+            
+            # Sessions are ordered oldest first, so stop at the first live one
+            while self.pagination_data:
+                data = next(iter(self.pagination_data.values()))
+                if current_time - data['created_at'] <= self.pagination_session_expiry:
+                    break
+                self.pagination_data.popitem(last=False)
+                expired_count += 1
+                
+            # Drop expired sessions from the session database as well
+            with self._session_db:
+                expired_count += self._session_db.execute(
+                    "DELETE FROM pagination_sessions WHERE last_used < ?",
+                    (time.time() - self.pagination_session_expiry,)
+                ).rowcount
+                
+            if expired_count:
+                self.logger.info(f"Cleaned up {expired_count} expired pagination sessions")
+        except Exception as e:
+            self.logger.error(f"Error cleaning up pagination sessions: {str(e)}")
+            
+    async def _sweep_pagination_sessions(self):
+        """Periodically remove expired pagination sessions while the bot runs."""
+        while True:
+            await asyncio.sleep(self.pagination_sweep_interval)
+            self._cleanup_expired_pagination_sessions()
+
     def format_for_telegram(self, text, use_html=True):
         """Format text for Telegram with consistent rules."""
         if not text:
@@ -314,26 +428,43 @@ class TelegramBot:
         
         # Always use HTML as the preferred format
         if use_html:
-            # Escape HTML special characters
-            text = html.escape(text)
-            
-            # Apply simple formatting
-            # Bold markdown to HTML
-            text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-            
-            # Italic markdown to HTML
-            text = re.sub(r'_(.*?)_', r'<i>\1</i>', text)
-            
-            # Handle bullet points
-            text = re.sub(r'^- ', '• ', text, flags=re.MULTILINE)
-            
-            return text
+            # Escape HTML special characters and convert bold, italic and bullets in one pass
+            parts = []
+            self._render_telegram_html(text, 0, len(text), parts)
+            return "".join(parts)
         else:
             # Plain text fallback - strip markdown
-            text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-            text = re.sub(r'_(.*?)_', r'\1', text)
+            text = _RE_BOLD.sub(r'\1', text)
+            text = _RE_ITALIC_UNDER.sub(r'\1', text)
             return text
 
+    def _render_telegram_html(self, text: str, start: int, end: int, parts: List[str]):
+        """
+        Append the HTML rendering of text[start:end] to parts.
+        
+        Args:
+            text: Markdown text
+            start: Start index of the range to render
+            end: End index of the range to render
+            parts: Output fragments
+        """
+        pos = start
+        for match in _RE_TELEGRAM_FMT.finditer(text, start, end):
+            # Literal runs never contain HTML-special characters, those are matched too
+            parts.append(text[pos:match.start()])
+            if match.lastindex is not None:
+                # Bold or italic; the inner text may hold the other style
+                tag = 'b' if match.lastindex == 1 else 'i'
+                parts.append(f'<{tag}>')
+                self._render_telegram_html(text, match.start(match.lastindex), match.end(match.lastindex), parts)
+                parts.append(f'</{tag}>')
+            elif match.group() == '- ':
+                parts.append('• ')
+            else:
+                parts.append(_HTML_ENTITIES[match.group()])
+            pos = match.end()
+        parts.append(text[pos:end])
+
     async def send_analysis_summary(self, update: Update, analysis: Dict[str, Any]):
         """
         Send a formatted summary of the analysis.
@@ -342,28 +473,24 @@ class TelegramBot:
             update: Telegram update object
             analysis: Analysis data dictionary
         """
-        summary = analysis.get("summary", "No summary available.")
-        # Sanitize the summary text
-        summary = str(summary)
+        # Escape the summary for HTML (done once per file for cached analyses)
+        formatted_summary = analysis.get("_summary_escaped")
+        if formatted_summary is None:
+            formatted_summary = html.escape(str(analysis.get("summary", "No summary available.")))
         analysis_id = analysis.get("id", datetime.now().strftime("%Y%m%d%H%M%S"))
         
-        # Create keyboard with buttons
-        keyboard = [
-            [
-                InlineKeyboardButton("View Details", callback_data=f"details_{analysis_id}"),
-                InlineKeyboardButton("View Sources", callback_data=f"sources_{analysis_id}")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Create keyboard with buttons for details and sources
+        reply_markup = _summary_markup(analysis_id)
         
         # Format the message
-        message = f"📊 *Latest Content Summary*\n\n{summary}"
+        message = f"📊 <b>Latest Content Summary</b>\n\n{formatted_summary}"
         
         # Send the message
-        await update.message.reply_text(
+        await self._reply(
+            update.message,
             message,
             reply_markup=reply_markup,
-            parse_mode="Markdown"  # Use MarkdownV2 for better escaping
+            parse_mode="HTML"
         )
     
     def sanitize_html(self, text: str) -> str:
@@ -380,11 +507,72 @@ class TelegramBot:
         
         return text
 
+    def _send_limiter(self) -> asyncio.Semaphore:
+        """Get the semaphore gating outgoing Telegram calls from the running event loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._send_slots.get(loop)
+        if slots is None:
+            slots = self._send_slots[loop] = asyncio.Semaphore(self.max_concurrent_sends)
+        return slots
+        
+    async def _reply(self, message, *args, **kwargs):
+        """Reply to a message within the outgoing call limit."""
+        async with self._send_limiter():
+            return await message.reply_text(*args, **kwargs)
+            
+    async def _send_message(self, **kwargs):
+        """Send a message within the outgoing call limit."""
+        async with self._send_limiter():
+            return await self.application.bot.send_message(**kwargs)
+            
+    async def _edit_message(self, query, *args, **kwargs):
+        """
+        Edit the message behind a callback query within the outgoing call limit.
+        
+        Only the latest edit of a message is kept: an edit still pending for the
+        same message is cancelled, since the user would only see the newer one.
+        
+        Args:
+            query: Callback query object
+            *args: Positional arguments for edit_message_text
+            **kwargs: Keyword arguments for edit_message_text
+            
+        Returns:
+            Result of edit_message_text, or None if a newer edit superseded this one
+        """
+        async def send():
+            async with self._send_limiter():
+                return await query.edit_message_text(*args, **kwargs)
+                
+        message = query.message
+        if message is None:
+            # Inline-mode messages have no chat/message pair to coalesce on
+            return await send()
+            
+        key = (message.chat_id, message.message_id)
+        previous = self._pending_edits.get(key)
+        if previous is not None:
+            previous.cancel()
+            
+        task = asyncio.ensure_future(send())
+        self._pending_edits[key] = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Superseded by a newer edit of the same message
+            if task.cancelled() and self._pending_edits.get(key) is not task:
+                return None
+            raise
+        finally:
+            if self._pending_edits.get(key) is task:
+                del self._pending_edits[key]
+
     async def send_formatted_message(self, query, text, reply_markup=None):
         """Send a message with progressive formatting fallbacks."""
         try:
             # Try with HTML formatting
-            await query.edit_message_text(
+            await self._edit_message(
+                query,
                 text=self.sanitize_html(text),
                 reply_markup=reply_markup,
                 parse_mode="HTML"
@@ -393,7 +581,8 @@ class TelegramBot:
             self.logger.warning(f"HTML formatting failed: {str(e1)}")
             try:
                 # Fall back to plain text
-                await query.edit_message_text(
+                await self._edit_message(
+                    query,
                     text=text,
                     reply_markup=reply_markup,
                     parse_mode=None
@@ -401,56 +590,98 @@ class TelegramBot:
             except Exception as e2:
                 self.logger.error(f"Plain text fallback also failed: {str(e2)}")
                 # Last resort: truncate the message
-                await query.edit_message_text(
+                await self._edit_message(
+                    query,
                     text=text[:3000] + "... (content truncated)",
                     reply_markup=reply_markup,
                     parse_mode=None
                 )
 
+    def _split_paragraph(self, para: str, limit: int) -> List[str]:
+        """
+        Split an over-long paragraph into pieces of at most limit characters.
+        
+        Pieces end on sentence boundaries where possible; a single sentence
+        longer than the limit is cut at the limit.
+        
+        Args:
+            para: Paragraph text
+            limit: Maximum piece length
+            
+        Returns:
+            List of pieces
+        """
+        pieces = []
+        current_sentences = []
+        current_length = 0
+        
+        for sentence in _RE_SENTENCE.findall(para):
+            if not sentence:
+                continue
+                
+            if current_length + len(sentence) > limit and current_sentences:
+                pieces.append("".join(current_sentences))
+                current_sentences = []
+                current_length = 0
+                
+            while len(sentence) > limit:
+                pieces.append(sentence[:limit])
+                sentence = sentence[limit:]
+                
+            current_sentences.append(sentence)
+            current_length += len(sentence)
+            
+        if current_sentences:
+            pieces.append("".join(current_sentences))
+            
+        return pieces
+
     def chunk_text(self, text, max_length=3000):
         """Break text into chunks that won't exceed Telegram's limits."""
         if len(text) <= max_length:
             return [text]
         
         chunks = []
-        current_chunk = ""
-        
-        # Split by paragraphs or sentences
-        paragraphs = text.split("\n\n")
-        for para in paragraphs:
-            if len(current_chunk) + len(para) + 2 > max_length:  # +2 for newlines
-                chunks.append(current_chunk)
-                current_chunk = para + "\n\n"
-            else:
-                current_chunk += para + "\n\n"
         
-        if current_chunk:
-            chunks.append(current_chunk)
+        # Paragraphs of the chunk being built, joined once when it is flushed
+        current_paras = []
+        current_length = 0
+        
+        # Longest paragraph that still fits a chunk with its trailing newlines
+        para_limit = max(1, max_length - 2)
+        
+        # Split by paragraphs, and over-long paragraphs by sentences
+        for para in text.split("\n\n"):
+            segments = [para] if len(para) <= para_limit else self._split_paragraph(para, para_limit)
+            for segment in segments:
+                if current_length + len(segment) + 2 > max_length and current_paras:  # +2 for newlines
+                    chunks.append("\n\n".join(current_paras) + "\n\n")
+                    current_paras = []
+                    current_length = 0
+                    
+                current_paras.append(segment)
+                current_length += len(segment) + 2
+        
+        if current_paras:
+            chunks.append("\n\n".join(current_paras) + "\n\n")
         
         return chunks
 
-    async def _display_content_page(self, query, pagination_key, analysis_id):
+    async def _display_content_page(self, query, pagination_key: Tuple[int, str]):
         """Display a single page of content with navigation controls using HTML formatting."""
         try:
             # Verify the pagination session exists
             if pagination_key not in self.pagination_data:
-                await query.edit_message_text("Session expired. Please try again.")
+                await self._edit_message(query, "Session expired. Please try again.")
                 return
                 
             data = self.pagination_data[pagination_key]
             current_page = data['current_page']
             pages = data['pages']
             
-            # Store the original analysis_id value for debugging
-            original_analysis_id = analysis_id
+            # Sessions are keyed by (user_id, analysis_id)
+            analysis_id = pagination_key[1]
             
-            # More robust extraction of analysis_id from pagination_key if needed
-            if pagination_key.startswith("details_"):
-                analysis_id = pagination_key[8:]  # Remove "details_" prefix
-            elif "_details_" in pagination_key:
-                # Handle user-specific pagination keys
-                analysis_id = pagination_key.split("_details_")[1]
-                
             self.logger.info(f"Navigation: page {current_page+1}/{len(pages)}, using analysis_id '{analysis_id}'")
             
             # Create navigation buttons
@@ -458,15 +689,15 @@ class TelegramBot:
             nav_row = []
             
             if current_page > 0:
-                nav_row.append(InlineKeyboardButton("◀️ Previous", callback_data=f"prev_{pagination_key}"))
+                nav_row.append(InlineKeyboardButton("◀️ Previous", callback_data=f"prev_{analysis_id}"))
             
-            nav_row.append(InlineKeyboardButton(f"{current_page+1}/{len(pages)}", callback_data=f"page_{pagination_key}"))
+            nav_row.append(InlineKeyboardButton(f"{current_page+1}/{len(pages)}", callback_data=f"page_{analysis_id}"))
             
             if current_page < len(pages)-1:
-                nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"next_{pagination_key}"))
+                nav_row.append(InlineKeyboardButton("Next ▶️", callback_data=f"next_{analysis_id}"))
             
             keyboard.append(nav_row)
-            keyboard.append([InlineKeyboardButton("Back to Summary", callback_data=f"back_{analysis_id}")])
+            keyboard.append(_back_markup(analysis_id).inline_keyboard[0])
             
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -474,46 +705,36 @@ class TelegramBot:
             header = f"🔍 <b>Detailed Analysis (Page {current_page+1}/{len(pages)})</b>\n\n"
             max_content_length = 3800 - len(header)
             
-            html_content = ""
-            added_items = 0
+            html_parts = []
+            content_length = 0
             
             for item in pages[current_page]:
-                # Remove leading Markdown bullet points before applying formatting
-                # This fixes the "• * " duplication issue
-                clean_item = item
-                if clean_item.startswith('* '):
-                    clean_item = clean_item[2:]  # Remove "* " prefix
-                elif clean_item.startswith('*'):
-                    clean_item = clean_item[1:]  # Remove "*" prefix
-                elif clean_item.startswith('- '):
-                    clean_item = clean_item[2:]  # Also handle "- " prefix
-                    
-                # Apply HTML formatting
-                safe_item = self.sanitize_html(clean_item)
+                # Items are escaped once and reused when the page is shown again
+                safe_item = _page_item_html(item)
                 item_html = f"• {safe_item}\n\n"
                 
-                if len(html_content) + len(item_html) > max_content_length:
-                    if added_items == 0:
+                if content_length + len(item_html) > max_content_length:
+                    if not html_parts:
                         # If we can't fit even one item, truncate it
                         available_space = max_content_length - len("• ...(truncated)\n\n")
                         truncated_item = safe_item[:available_space] + "...(truncated)"
-                        html_content += f"• {truncated_item}\n\n"
-                        added_items += 1
+                        html_parts.append(f"• {truncated_item}\n\n")
                     break
                 
-                html_content += formatted_item
-                added_items += 1
+                html_parts.append(item_html)
+                content_length += len(item_html)
             
             # Add note if content was truncated
-            if added_items < len(pages[current_page]):
-                remaining = len(pages[current_page]) - added_items
-                html_content += f"<i>...and {remaining} more item(s). Content truncated due to size limits.</i>"
+            if len(html_parts) < len(pages[current_page]):
+                remaining = len(pages[current_page]) - len(html_parts)
+                html_parts.append(f"<i>...and {remaining} more item(s). Content truncated due to size limits.</i>")
             
             # Combine header and content
-            full_message = header + html_content
+            full_message = header + "".join(html_parts)
             
             # Send with HTML parsing
-            await query.edit_message_text(
+            await self._edit_message(
+                query,
                 text=full_message,
                 reply_markup=reply_markup,
                 parse_mode="HTML"
@@ -527,30 +748,30 @@ class TelegramBot:
                 plain_header = f"🔍 Detailed Analysis (Page {current_page+1}/{len(pages)})\n\n"
                 max_content_length = 3800 - len(plain_header)
                 
-                plain_content = ""
-                added_items = 0
+                plain_parts = []
+                content_length = 0
                 
                 for item in pages[current_page]:
                     # Strip markdown and HTML tags for plain text
-                    plain_item = re.sub(r'<.*?>', '', item)  # Remove HTML tags
-                    plain_item = re.sub(r'[*_~`]', '', plain_item)  # Remove markdown symbols
+                    plain_item = _RE_HTML_TAG.sub('', item)  # Remove HTML tags
+                    plain_item = _RE_MD_SYM.sub('', plain_item)  # Remove markdown symbols
                     formatted_item = f"• {plain_item}\n\n"
                     
-                    if len(plain_content) + len(formatted_item) > max_content_length:
-                        if added_items == 0:
+                    if content_length + len(formatted_item) > max_content_length:
+                        if not plain_parts:
                             available_space = max_content_length - len("• ...(truncated)\n\n")
                             truncated_item = plain_item[:available_space] + "...(truncated)"
-                            plain_content += f"• {truncated_item}\n\n"
-                            added_items += 1
+                            plain_parts.append(f"• {truncated_item}\n\n")
                         break
                     
-                    plain_content += formatted_item
-                    added_items += 1
+                    plain_parts.append(formatted_item)
+                    content_length += len(formatted_item)
                 
-                full_message = plain_header + plain_content
+                full_message = plain_header + "".join(plain_parts)
                 
                 # Send without formatting
-                await query.edit_message_text(
+                await self._edit_message(
+                    query,
                     text=full_message,
                     reply_markup=reply_markup
                 )
@@ -558,51 +779,57 @@ class TelegramBot:
             except Exception as fallback_error:
                 # Minimal fallback
                 self.logger.error(f"Plain text fallback also failed: {str(fallback_error)}")
-                await query.edit_message_text(
+                await self._edit_message(
+                    query,
                     text="Content is too large to display properly. Please use navigation buttons or return to summary.",
-                    reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Summary", callback_data=f"back_{analysis_id}")]])
+                    reply_markup=_back_markup(analysis_id)
                 )
 
+    def _paginate_contents(self, contents: List[str], items_per_page: int = 5) -> tuple:
+        """
+        Split detail items into pages.
+        
+        Args:
+            contents: Detail items of an analysis
+            items_per_page: Number of items on each page
+            
+        Returns:
+            Tuple of pages, each a tuple of items
+        """
+        return tuple(
+            tuple(contents[i:i + items_per_page])
+            for i in range(0, len(contents), items_per_page)
+        )
+        
     async def send_analysis_details(self, query, analysis: Dict[str, Any]):
         """Send detailed analysis information with proper formatting."""
         contents = analysis.get("contents", [])
         analysis_id = analysis.get("id", "unknown")
         
         if not contents:
-            await query.edit_message_text("No detailed information available.")
+            await self._edit_message(query, "No detailed information available.")
             return
         
-        # Set up pagination with original content (not pre-converted)
-        pagination_key = f"details_{analysis_id}"
-        
-        # Split content into pages (5 items per page)
-        items_per_page = 5
-        pages = []
-        current_page = []
-        
-        for i, point in enumerate(contents):
-            current_page.append(point)  # Store the original point with markdown
-            if (i + 1) % items_per_page == 0:
-                pages.append(current_page)
-                current_page = []
-        
-        # Add the last page if it has any items
-        if current_page:
-            pages.append(current_page)
+        # Pages are precomputed when the analysis is loaded
+        pages = analysis.get("_pages")
+        if pages is None:
+            pages = self._paginate_contents(contents)
         
         # If no pages were created (this shouldn't happen if contents has items)
         if not pages:
-            await query.edit_message_text("No content available to display.")
+            await self._edit_message(query, "No content available to display.")
             return
         
-        # Store pagination data
+        # Store a per-user pagination session referencing the shared pages
+        pagination_key = (query.from_user.id, analysis_id)
         self.pagination_data[pagination_key] = {
             'pages': pages,
             'current_page': 0
         }
+        self._touch_pagination_session(pagination_key)
         
         # Display the first page
-        await self._display_content_page(query, pagination_key, analysis_id)
+        await self._display_content_page(query, pagination_key)
 
     def _markdown_to_html(self, text: str) -> str:
         """
@@ -622,21 +849,18 @@ class TelegramBot:
         
         # Convert markdown to HTML
         # Bold: **text** or __text__ to <b>text</b>
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'__(.*?)__', r'<b>\1</b>', text)
+        text = _RE_BOLD.sub(r'<b>\1</b>', text)
+        text = _RE_BOLD_UNDER.sub(r'<b>\1</b>', text)
         
         # Italic: *text* or _text_ to <i>text</i>
-        text = re.sub(r'\*((?!\*).+?)\*', r'<i>\1</i>', text)
-        text = re.sub(r'_((?!_).+?)_', r'<i>\1</i>', text)
+        text = _RE_ITALIC_STAR.sub(r'<i>\1</i>', text)
+        text = _RE_ITALIC_SINGLE_UNDER.sub(r'<i>\1</i>', text)
         
         # Strikethrough: ~~text~~ to <s>text</s>
-        text = re.sub(r'~~(.*?)~~', r'<s>\1</s>', text)
-        
-        # Underline: __text__ to <u>text</u> (if not already processed as bold)
-        text = re.sub(r'__(.*?)__', r'<u>\1</u>', text)
+        text = _RE_STRIKE.sub(r'<s>\1</s>', text)
         
         # Code: `text` to <code>text</code>
-        text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
+        text = _RE_CODE.sub(r'<code>\1</code>', text)
         
         return text
             
@@ -652,28 +876,137 @@ class TelegramBot:
         analysis_id = analysis.get("id", "unknown")
         
         if not sources:
-            await query.edit_message_text("No source information available.")
+            await self._edit_message(query, "No source information available.")
             return
             
         # Format sources
-        sources_text = "📚 *Sources*\n\n"
+        sources_text = "📚 <b>Sources</b>\n\n"
         for i, source in enumerate(sources, 1):
-            channel_name = source.get("channel_name", "Unknown")
+            channel_name = html.escape(str(source.get("channel_name", "Unknown")))
             message_count = source.get("message_count", 0)
             sources_text += f"{i}. {channel_name}: {message_count} messages\n"
             
         # Create back button
-        keyboard = [[InlineKeyboardButton("Back to Summary", callback_data=f"back_{analysis_id}")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = _back_markup(analysis_id)
         
         # Send the message
-        await query.edit_message_text(
+        await self._edit_message(
+            query,
             sources_text,
             reply_markup=reply_markup,
-            parse_mode="Markdown"
+            parse_mode="HTML"
         )
         
-    def get_latest_analysis(self) -> Optional[Dict[str, Any]]:
+    def _latest_analysis_file(self, analysis_dir: str) -> Optional[str]:
+        """
+        Get the name of the newest analysis file.
+        
+        The listing is reused while the directory's mtime is unchanged.
+        
+        Args:
+            analysis_dir: Directory holding the analysis files
+            
+        Returns:
+            File name of the latest analysis, or None if there is none
+        """
+        dir_mtime_ns = os.stat(analysis_dir).st_mtime_ns
+        if self._latest_listing is not None and self._latest_listing[0] == dir_mtime_ns:
+            return self._latest_listing[1]
+            
+        # Single pass for the greatest filename (assuming timestamp-based naming)
+        with os.scandir(analysis_dir) as entries:
+            latest_file = max(
+                (entry.name for entry in entries if entry.name.endswith('.json')),
+                default=None
+            )
+        
+        # Only trust the listing once the mtime is safely in the past; on filesystems
+        # with coarse timestamps a file added in the same tick would not change it
+        if time.time() - dir_mtime_ns / 1e9 > 2:
+            self._latest_listing = (dir_mtime_ns, latest_file)
+            
+        return latest_file
+    
+    def _load_analysis(self, analysis_id: str, analysis_path: str) -> Dict[str, Any]:
+        """
+        Load an analysis file, serving it from memory while the file is unchanged.
+        
+        The returned dictionary is shared with the cache and must not be modified.
+        
+        Args:
+            analysis_id: Analysis ID (the file name without extension)
+            analysis_path: Path to the analysis file
+            
+        Returns:
+            Analysis dictionary including its ID
+        """
+        mtime_ns = os.stat(analysis_path).st_mtime_ns
+        with self._analysis_cache_lock:
+            cached = self._analysis_cache.get(analysis_id)
+            if cached is not None and cached[0] == mtime_ns:
+                self._analysis_cache.move_to_end(analysis_id)
+                return cached[1]
+            
+        with open(analysis_path, 'rb') as f:
+            data = f.read()
+        analysis = loads(data)
+            
+        # Add ID based on filename
+        analysis["id"] = analysis_id
+        
+        # Paginate the details once per file; sessions share the pages by reference
+        analysis["_pages"] = self._paginate_contents(analysis.get("contents", []))
+        
+        # Escape the summary once for the HTML summary view
+        analysis["_summary_escaped"] = html.escape(str(analysis.get("summary", "No summary available.")))
+        
+        with self._analysis_cache_lock:
+            self._analysis_cache[analysis_id] = (mtime_ns, analysis)
+            self._analysis_cache.move_to_end(analysis_id)
+            if len(self._analysis_cache) > self._analysis_cache_size:
+                self._analysis_cache.popitem(last=False)
+            
+        return analysis
+    
+    def _read_latest_analysis(self) -> Optional[Dict[str, Any]]:
+        """Blocking part of get_latest_analysis, run off the event loop."""
+        # Look for the latest analysis file
+        analysis_dir = self.analysis_dir
+        if not os.path.exists(analysis_dir):
+            return None
+            
+        latest_file = self._latest_analysis_file(analysis_dir)
+        if not latest_file:
+            return None
+            
+        return self._load_analysis(
+            latest_file.replace('.json', ''),
+            os.path.join(analysis_dir, latest_file)
+        )
+        
+    def _read_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Blocking part of get_analysis_by_id, run off the event loop."""
+        analysis_path = os.path.join(self.analysis_dir, f"{analysis_id}.json")
+        
+        if not os.path.exists(analysis_path):
+            self.logger.warning(f"Analysis file not found at path: {analysis_path}")
+            
+            # Try to find the most recent analysis if the specific one isn't found
+            analysis_dir = self.analysis_dir
+            if os.path.exists(analysis_dir):
+                latest_file = self._latest_analysis_file(analysis_dir)
+                if latest_file:
+                    self.logger.info("Falling back to most recent analysis file")
+                    analysis_path = os.path.join(analysis_dir, latest_file)
+                    analysis_id = latest_file.replace('.json', '')
+            
+            # If still not found after fallback attempt
+            if not os.path.exists(analysis_path):
+                return None
+            
+        return self._load_analysis(analysis_id, analysis_path)
+    
+    async def get_latest_analysis(self) -> Optional[Dict[str, Any]]:
         """
         Get the latest analysis result.
         
@@ -681,59 +1014,19 @@ class TelegramBot:
             Latest analysis dictionary or None
         """
         try:
-            # Look for the latest analysis file
-            analysis_dir = os.path.join(os.getcwd(), "analysis")
-            if not os.path.exists(analysis_dir):
-                return None
-                
-            analysis_files = [f for f in os.listdir(analysis_dir) if f.endswith('.json')]
-            if not analysis_files:
-                return None
-                
-            # Sort by filename (assuming timestamp-based naming)
-            latest_file = sorted(analysis_files)[-1]
-            
-            with open(os.path.join(analysis_dir, latest_file), 'r', encoding='utf-8') as f:
-                analysis = json.load(f)
-                
-            # Add ID based on filename
-            analysis["id"] = latest_file.replace('.json', '')
-            
-            return analysis
+            # Disk access and parsing run in a worker thread so other handlers keep running
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._io_executor, self._read_latest_analysis)
             
         except Exception as e:
             self.logger.error(f"Error getting latest analysis: {str(e)}")
             return None
             
-    def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+    async def get_analysis_by_id(self, analysis_id: str) -> Optional[Dict[str, Any]]:
         """Get analysis by ID with improved error handling and fallback options."""
         try:
-            analysis_path = os.path.join(os.getcwd(), "analysis", f"{analysis_id}.json")
-            
-            if not os.path.exists(analysis_path):
-                self.logger.warning(f"Analysis file not found at path: {analysis_path}")
-                
-                # Try to find the most recent analysis if the specific one isn't found
-                analysis_dir = os.path.join(os.getcwd(), "analysis")
-                if os.path.exists(analysis_dir):
-                    analysis_files = [f for f in os.listdir(analysis_dir) if f.endswith('.json')]
-                    if analysis_files:
-                        self.logger.info("Falling back to most recent analysis file")
-                        latest_file = sorted(analysis_files)[-1]
-                        analysis_path = os.path.join(analysis_dir, latest_file)
-                        analysis_id = latest_file.replace('.json', '')
-                
-                # If still not found after fallback attempt
-                if not os.path.exists(analysis_path):
-                    return None
-                
-            with open(analysis_path, 'r', encoding='utf-8') as f:
-                analysis = json.load(f)
-                
-            # Add ID
-            analysis["id"] = analysis_id
-            
-            return analysis
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._io_executor, self._read_analysis_by_id, analysis_id)
             
         except Exception as e:
             self.logger.error(f"Error getting analysis by ID {analysis_id}: {str(e)}")
@@ -750,10 +1043,6 @@ class TelegramBot:
             Analysis ID
         """
         try:
-            # Create analysis directory if it doesn't exist
-            analysis_dir = os.path.join(os.getcwd(), "analysis")
-            os.makedirs(analysis_dir, exist_ok=True)
-            
             # Generate ID based on timestamp
             analysis_id = datetime.now().strftime("%Y%m%d%H%M%S")
             
@@ -761,8 +1050,8 @@ class TelegramBot:
             analysis["id"] = analysis_id
             
             # Save to file
-            with open(os.path.join(analysis_dir, f"{analysis_id}.json"), 'w', encoding='utf-8') as f:
-                json.dump(analysis, f, ensure_ascii=False, indent=2)
+            with open(os.path.join(self.analysis_dir, f"{analysis_id}.json"), 'wb') as f:
+                f.write(dumps(analysis, indent=True))
                 
             return analysis_id
             
@@ -778,64 +1067,34 @@ class TelegramBot:
             analysis: Analysis data
             user_ids: List of user IDs to send to
         """
-        for user_id in user_ids:
-            try:
-                # Store the analysis first
-                analysis_id = self.store_analysis(analysis)
-                if not analysis_id:
-                    continue
-                    
-                # Format summary
-                summary = analysis.get("summary", "No summary available.")
-                
-                # Option 1: Switch to HTML formatting (recommended)
-                import html
-                formatted_summary = html.escape(summary)
-                
-                # Create keyboard with buttons
-                keyboard = [
-                    [
-                        InlineKeyboardButton("View Details", callback_data=f"details_{analysis_id}"),
-                        InlineKeyboardButton("View Sources", callback_data=f"sources_{analysis_id}")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                # Format the message with HTML
-                message = f"📊 <b>New Content Summary</b>\n\n{formatted_summary}"
-                
-                # Send the message with HTML parsing
-                await self.application.bot.send_message(
+        # Store the analysis once, off the event loop; every user gets the same ID
+        loop = asyncio.get_running_loop()
+        analysis_id = await loop.run_in_executor(self._io_executor, self.store_analysis, analysis)
+        if not analysis_id:
+            return
+            
+        # Create keyboard with buttons for details and sources
+        reply_markup = _summary_markup(analysis_id)
+        
+        # Send the summary as plain text with a bold heading entity, so it needs no escaping
+        message = _BROADCAST_HEADER + analysis.get("summary", "No summary available.")
+        
+        # Send to all users concurrently; _send_message keeps the calls under the rate limit
+        results = await asyncio.gather(
+            *(
+                self._send_message(
                     chat_id=user_id,
                     text=message,
-                    reply_markup=reply_markup,
-                    parse_mode="HTML"
+                    entities=_BROADCAST_ENTITIES,
+                    reply_markup=reply_markup
                 )
-                
-                # Option 2 (alternative): If you prefer to keep using MarkdownV2
-                # sanitized_summary = self.sanitize_markdown_v2(summary)
-                # message = f"📊 *New Content Summary*\n\n{sanitized_summary}"
-                # await self.application.bot.send_message(
-                #     chat_id=user_id,
-                #     text=message,
-                #     reply_markup=reply_markup,
-                #     parse_mode="MarkdownV2"
-                # )
-                    
-            except Exception as e:
-                self.logger.error(f"Error sending analysis to user {user_id}: {str(e)}")
-                
-                # Fallback: Send without formatting
-                try:
-                    await self.application.bot.send_message(
-                        chat_id=user_id,
-                        text="📊 New Content Summary\n\n" + analysis.get("summary", "No summary available."),
-                        reply_markup=reply_markup,
-                        parse_mode=None
-                    )
-                    self.logger.info(f"Sent unformatted fallback message to user {user_id}")
-                except Exception as fallback_error:
-                    self.logger.error(f"Fallback also failed for user {user_id}: {str(fallback_error)}")
+                for user_id in user_ids
+            ),
+            return_exceptions=True
+        )
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error sending analysis to user {user_id}: {str(result)}")
     
     async def start_polling(self):
         """Start the bot in polling mode."""
@@ -850,8 +1109,15 @@ class TelegramBot:
             await self.application.initialize()
             await self.application.updater.start_polling()
             
+        if self._pagination_sweep_task is None:
+            self._pagination_sweep_task = asyncio.create_task(self._sweep_pagination_sessions())
+            
     async def stop(self):
         """Stop the bot."""
+        if self._pagination_sweep_task is not None:
+            self._pagination_sweep_task.cancel()
+            self._pagination_sweep_task = None
+            
         if hasattr(self.application, "run_polling"):
             # For Python-Telegram-Bot v20+
             await self.application.updater.stop()
@@ -860,6 +1126,12 @@ class TelegramBot:
         else:
             # For older versions
             await self.application.updater.stop()
+            
+        self._io_executor.shutdown(wait=False)
+        
+        # Keep in-memory pagination sessions across restarts
+        self._spill_pagination_sessions(list(self.pagination_data.items()))
+        self.pagination_data.clear()
 
 async def main():
     """Example usage of the TelegramBot."""
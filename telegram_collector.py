@@ -1,12 +1,15 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from telethon import TelegramClient, events
+import time
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from telethon import TelegramClient
 from telethon.tl.functions.messages import GetHistoryRequest
-from telethon.tl.types import InputPeerChannel, MessageMediaPhoto, MessageMediaDocument
+from telethon.tl.types import MessageMediaPhoto, MessageMediaDocument
 import os
-from typing import List, Dict, Any, Optional
-import json
+from typing import List, Dict, Any, Optional, Tuple
+from json_utils import dump_file, dumps, loads
+
 
 class TelegramCollector:
     def __init__(self, api_id: str, api_hash: str, session_name: str = "telegram_collector"):
@@ -27,6 +30,26 @@ class TelegramCollector:
         # Create directory for downloaded media
         self.media_dir = os.path.join(os.getcwd(), "media")
         os.makedirs(self.media_dir, exist_ok=True)
+        
+        # Directory and file for the last processed message IDs per channel
+        self.data_dir = os.path.join(os.getcwd(), "data")
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.tracking_file = os.path.join(self.data_dir, "last_message_tracking.json")
+        
+        # Number of media files downloaded in parallel per channel batch
+        self.media_download_concurrency = 8
+        
+        # Number of channels collected at the same time
+        self.channel_concurrency = 4
+        
+        # Resolved channel entities by username, and channel info by channel ID
+        # with the time it was fetched; info is refreshed after channel_info_ttl seconds
+        self._entity_cache = {}
+        self._channel_info_cache = {}
+        self.channel_info_ttl = 3600
+        
+        # Tracking data as last read from or written to disk; unchanged data is not rewritten
+        self._saved_tracking = None
     
     async def start(self):
         """Start the Telegram client."""
@@ -38,24 +61,49 @@ class TelegramCollector:
         await self.client.disconnect()
         self.logger.info("Telegram client stopped")
     
-    async def get_channel_info(self, channel_username: str) -> Dict[str, Any]:
+    async def _resolve_entity(self, channel_username: str):
+        """
+        Resolve a channel username to its entity, reusing earlier resolutions.
+        
+        Args:
+            channel_username: Channel username or ID
+            
+        Returns:
+            Telegram entity for the channel
+        """
+        entity = self._entity_cache.get(channel_username)
+        if entity is None:
+            entity = await self.client.get_entity(channel_username)
+            self._entity_cache[channel_username] = entity
+        return entity
+    
+    async def get_channel_info(self, channel_username: str, entity=None) -> Dict[str, Any]:
         """
         Get information about a channel.
         
         Args:
             channel_username: Channel username or ID
+            entity: Already-resolved entity for the channel (optional)
             
         Returns:
             Dictionary with channel info
         """
-        entity = await self.client.get_entity(channel_username)
-        return {
+        if entity is None:
+            entity = await self._resolve_entity(channel_username)
+            
+        cached = self._channel_info_cache.get(entity.id)
+        if cached is not None and time.monotonic() - cached[0] < self.channel_info_ttl:
+            return cached[1]
+            
+        channel_info = {
             "id": entity.id,
             "title": entity.title if hasattr(entity, "title") else None,
             "username": entity.username if hasattr(entity, "username") else None,
             "description": entity.about if hasattr(entity, "about") else None,
             "participants_count": await self.client.get_participants_count(entity) if hasattr(self.client, "get_participants_count") else None
         }
+        self._channel_info_cache[entity.id] = (time.monotonic(), channel_info)
+        return channel_info
     
     async def download_media(self, message) -> Optional[str]:
         """
@@ -74,6 +122,67 @@ class TelegramCollector:
             return path
         return None
     
+    async def _download_media_batch(self, pending: List[tuple]):
+        """
+        Download media for a batch of messages concurrently.
+        
+        Args:
+            pending: (message data dictionary, Telegram message) pairs; each
+                dictionary's media_path is filled in once its download finishes
+        """
+        if not pending:
+            return
+            
+        semaphore = asyncio.Semaphore(self.media_download_concurrency)
+        
+        async def bounded_download(msg):
+            async with semaphore:
+                return await self.download_media(msg)
+                
+        results = await asyncio.gather(
+            *(bounded_download(msg) for _, msg in pending),
+            return_exceptions=True
+        )
+        for (message_data, msg), result in zip(pending, results):
+            if isinstance(result, Exception):
+                self.logger.warning(f"Could not download media for message {msg.id}: {str(result)}")
+            else:
+                message_data["media_path"] = result
+    
+    async def _resolve_reply_texts(self, entity, batch: List[Any], channel_messages: List[Dict[str, Any]]):
+        """
+        Fill in reply_to_msg_text for the collected messages that are replies.
+        
+        Replied-to messages are looked up in the retrieved batch first; the rest
+        are fetched from the server in a single request.
+        
+        Args:
+            entity: Channel entity the messages belong to
+            batch: Telegram messages retrieved for the channel
+            channel_messages: Message data dictionaries collected from the batch
+        """
+        msgs_by_id = {m.id: m for m in batch}
+        
+        # Replied-to messages outside the current batch, without duplicates
+        missing_ids = list(dict.fromkeys(
+            message_data["reply_to_msg_id"]
+            for message_data in channel_messages
+            if message_data["reply_to_msg_id"] is not None and message_data["reply_to_msg_id"] not in msgs_by_id
+        ))
+        if missing_ids:
+            try:
+                fetched = await self.client.get_messages(entity, ids=missing_ids)
+                msgs_by_id.update(zip(missing_ids, fetched))
+            except Exception as e:
+                self.logger.warning(f"Could not fetch replied-to messages {missing_ids}: {str(e)}")
+                
+        for message_data in channel_messages:
+            original_msg = msgs_by_id.get(message_data["reply_to_msg_id"])
+            
+            # If we found the original message, get its text
+            if original_msg:
+                message_data["reply_to_msg_text"] = original_msg.message if hasattr(original_msg, "message") else ""
+    
     # Add this function to the TelegramCollector class
     async def verify_channels(self, channel_usernames: List[str]) -> List[str]:
         """Verify channel usernames and return the list of accessible channels."""
@@ -81,7 +190,7 @@ class TelegramCollector:
         
         for username in channel_usernames:
             try:
-                entity = await self.client.get_entity(username)
+                entity = await self._resolve_entity(username)
                 self.logger.info(f"Channel {username} is accessible (ID: {entity.id})")
                 accessible_channels.append(username)
             except Exception as e:
@@ -89,165 +198,207 @@ class TelegramCollector:
         
         return accessible_channels
 
-    async def get_new_messages_without_duplication(self, channel_usernames: List[str], limit: int = 100, fallback_hours: int = 24):
+    async def _gather_channels(self, channel_usernames: List[str], collect, *args) -> List[Any]:
         """
-        Collect only genuinely new messages without duplication.
+        Run a per-channel collection coroutine for every channel concurrently.
+        
+        At most channel_concurrency channels are collected at the same time.
         
         Args:
-            channel_usernames: List of channel usernames to collect from
-            limit: Maximum number of messages to collect per channel
-            fallback_hours: Hours to look back if message ID tracking is unavailable
+            channel_usernames: List of channel usernames
+            collect: Coroutine function called as collect(username, *args)
+            *args: Extra arguments passed to collect
             
         Returns:
-            List of processed message dictionaries
+            Results of collect, in the order of channel_usernames
         """
-        all_messages = []
-        last_message_tracking = self._load_last_message_tracking()
+        semaphore = asyncio.Semaphore(self.channel_concurrency)
         
-        for username in channel_usernames:
-            try:
-                self.logger.info(f"Attempting to access channel: {username}")
-                entity = await self.client.get_entity(username)
-                channel_id = str(entity.id)
-                self.logger.info(f"Successfully resolved entity for {username}: ID {entity.id}")
+        async def collect_bounded(username: str):
+            async with semaphore:
+                return await collect(username, *args)
                 
-                # Get channel information
-                channel_info = await self.get_channel_info(username)
+        return await asyncio.gather(*(collect_bounded(username) for username in channel_usernames))
+    
+    async def _collect_new_channel_messages(self, username: str, last_message_tracking: Dict[str, int], limit: int, fallback_hours: int) -> Optional[Tuple[str, List[Dict[str, Any]], int]]:
+        """
+        Collect the new messages of one channel for get_new_messages_without_duplication.
+        
+        Args:
+            username: Channel username
+            last_message_tracking: Last processed message ID per channel ID; only read here
+            limit: Maximum number of messages to collect
+            fallback_hours: Hours to look back if message ID tracking is unavailable
+            
+        Returns:
+            Tuple of channel ID, collected messages (newest first) and newest message ID,
+            or None if the channel could not be read
+        """
+        try:
+            self.logger.info(f"Attempting to access channel: {username}")
+            entity = await self._resolve_entity(username)
+            channel_id = str(entity.id)
+            self.logger.info(f"Successfully resolved entity for {username}: ID {entity.id}")
+            
+            # Get channel information
+            channel_info = await self.get_channel_info(username, entity)
+            
+            # Determine collection strategy
+            use_id_tracking = channel_id in last_message_tracking and last_message_tracking[channel_id] > 0
+            
+            if use_id_tracking:
+                # Get messages newer than the last processed message ID
+                last_message_id = last_message_tracking[channel_id]
+                self.logger.info(f"Retrieving messages newer than ID {last_message_id} for {username}")
                 
-                # Determine collection strategy
-                use_id_tracking = channel_id in last_message_tracking and last_message_tracking[channel_id] > 0
+                messages = await self.client(GetHistoryRequest(
+                    peer=entity,
+                    limit=limit,
+                    offset_date=None,
+                    offset_id=0,
+                    max_id=0,
+                    min_id=last_message_id + 1,
+                    add_offset=0,
+                    hash=0
+                ))
+            else:
+                # Fallback: Get messages from the last fallback_hours
+                since_date = datetime.now(timezone.utc) - timedelta(hours=fallback_hours)
+                self.logger.info(f"No message tracking data for {username}, falling back to time-based retrieval (since {since_date.isoformat()})")
                 
-                if use_id_tracking:
-                    # Get messages newer than the last processed message ID
-                    last_message_id = last_message_tracking[channel_id]
-                    self.logger.info(f"Retrieving messages newer than ID {last_message_id} for {username}")
-                    
-                    messages = await self.client(GetHistoryRequest(
-                        peer=entity,
-                        limit=limit,
-                        offset_date=None,
-                        offset_id=0,
-                        max_id=0,
-                        min_id=last_message_id + 1,
-                        add_offset=0,
-                        hash=0
-                    ))
-                else:
-                    # Fallback: Get messages from the last fallback_hours
-                    from datetime import timezone, datetime, timedelta
-                    since_date = datetime.now(timezone.utc) - timedelta(hours=fallback_hours)
-                    self.logger.info(f"No message tracking data for {username}, falling back to time-based retrieval (since {since_date.isoformat()})")
+                messages = await self.client(GetHistoryRequest(
+                    peer=entity,
+                    limit=limit,
+                    offset_date=None,
+                    offset_id=0,
+                    max_id=0,
+                    min_id=0,
+                    add_offset=0,
+                    hash=0
+                ))
+            
+            self.logger.info(f"Retrieved {len(messages.messages)} raw messages from {username}")
+            
+            # Process messages
+            message_count = 0
+            channel_messages = []
+            pending_media = []
+            newest_id = last_message_tracking.get(channel_id, 0)
+            
+            for msg in messages.messages:
+                # If using time-based fallback, filter by date. History is newest first,
+                # so every message after the first one that is too old is too old as well
+                if not use_id_tracking:
+                    msg_date = msg.date if msg.date.tzinfo is not None else msg.date.replace(tzinfo=timezone.utc)
                     
-                    messages = await self.client(GetHistoryRequest(
-                        peer=entity,
-                        limit=limit,
-                        offset_date=None,
-                        offset_id=0,
-                        max_id=0,
-                        min_id=0,
-                        add_offset=0,
-                        hash=0
-                    ))
+                    if msg_date < since_date:
+                        break
                 
-                self.logger.info(f"Retrieved {len(messages.messages)} raw messages from {username}")
+                # Media is downloaded for the whole batch once the loop is done
+                media_type = None
                 
-                # Process messages
-                message_count = 0
-                channel_messages = []
+                if isinstance(msg.media, MessageMediaPhoto):
+                    media_type = "photo"
+                elif isinstance(msg.media, MessageMediaDocument):
+                    media_type = "document"
                 
-                for msg in messages.messages:
-                    # If using time-based fallback, filter by date
-                    if not use_id_tracking:
-                        msg_date = msg.date
-                        if msg_date.tzinfo is None:
-                            msg_date = msg_date.replace(tzinfo=timezone.utc)
-                        
-                        if msg_date < since_date:
-                            continue
-                    
-                    # Download media if present
-                    media_path = await self.download_media(msg)
-                    media_type = None
-                    
-                    if isinstance(msg.media, MessageMediaPhoto):
-                        media_type = "photo"
-                    elif isinstance(msg.media, MessageMediaDocument):
-                        media_type = "document"
-                    
-                    # Handle reply relationships
-                    reply_to_msg_id = None
-                    reply_to_msg_text = None
-                    
-                    if hasattr(msg, 'reply_to') and msg.reply_to:
-                        reply_to_msg_id = msg.reply_to.reply_to_msg_id
-                        
-                        try:
-                            # Find the original message in the current batch first
-                            original_msg = next((m for m in messages.messages if m.id == reply_to_msg_id), None)
-                            
-                            # If not found in the current batch, try to fetch it from the server
-                            if not original_msg:
-                                original_msg = await self.client.get_messages(entity, ids=reply_to_msg_id)
-                                
-                            # If we found the original message, get its text
-                            if original_msg:
-                                reply_to_msg_text = original_msg.message if hasattr(original_msg, "message") else ""
-                                
-                        except Exception as e:
-                            self.logger.warning(f"Could not fetch replied-to message {reply_to_msg_id}: {str(e)}")
-                    
-                    # Create message data dictionary
-                    message_data = {
-                        "id": msg.id,
-                        "channel_id": entity.id,
-                        "channel_title": channel_info.get("title"),
-                        "channel_username": channel_info.get("username"),
-                        "channel_description": channel_info.get("description"),
-                        "date": msg.date.isoformat(),
-                        "text": msg.message if hasattr(msg, "message") else "",
-                        "media_path": media_path,
-                        "media_type": media_type,
-                        "views": msg.views if hasattr(msg, "views") else None,
-                        "forwards": msg.forwards if hasattr(msg, "forwards") else None,
-                        "reply_to_msg_id": reply_to_msg_id,
-                        "reply_to_msg_text": reply_to_msg_text
-                    }
-                    
-                    channel_messages.append(message_data)
-                    message_count += 1
-                
-                # Update message tracking with the newest message ID
-                if channel_messages and use_id_tracking:
-                    newest_id = max(msg["id"] for msg in channel_messages)
-                    last_message_tracking[channel_id] = max(newest_id, last_message_tracking[channel_id])
-                elif channel_messages:
-                    # Initialize tracking for this channel
-                    newest_id = max(msg["id"] for msg in channel_messages)
-                    last_message_tracking[channel_id] = newest_id
+                # Handle reply relationships; the replied-to text is filled in after the loop
+                reply_to_msg_id = None
+                if hasattr(msg, 'reply_to') and msg.reply_to:
+                    reply_to_msg_id = msg.reply_to.reply_to_msg_id
                 
-                # Add all messages from this channel to the main collection
-                all_messages.extend(channel_messages)
-                self.logger.info(f"Added {message_count} messages from {username}")
+                # Create message data dictionary
+                message_data = {
+                    "id": msg.id,
+                    "channel_id": entity.id,
+                    "channel_title": channel_info.get("title"),
+                    "channel_username": channel_info.get("username"),
+                    "channel_description": channel_info.get("description"),
+                    "date": msg.date.isoformat(),
+                    "text": msg.message if hasattr(msg, "message") else "",
+                    "media_path": None,
+                    "media_type": media_type,
+                    "views": msg.views if hasattr(msg, "views") else None,
+                    "forwards": msg.forwards if hasattr(msg, "forwards") else None,
+                    "reply_to_msg_id": reply_to_msg_id,
+                    "reply_to_msg_text": None
+                }
                 
-            except Exception as e:
-                self.logger.error(f"Error retrieving messages from {username}: {str(e)}")
+                channel_messages.append(message_data)
+                message_count += 1
+                if msg.id > newest_id:
+                    newest_id = msg.id
+                if msg.media:
+                    pending_media.append((message_data, msg))
+            
+            # Download media and resolve replied-to messages for this channel concurrently
+            await asyncio.gather(
+                self._download_media_batch(pending_media),
+                self._resolve_reply_texts(entity, messages.messages, channel_messages)
+            )
+            self.logger.info(f"Added {message_count} messages from {username}")
+            return channel_id, channel_messages, newest_id
+            
+        except Exception as e:
+            self.logger.error(f"Error retrieving messages from {username}: {str(e)}")
+            return None
+    
+    async def get_new_messages_without_duplication(self, channel_usernames: List[str], limit: int = 100, fallback_hours: int = 24):
+        """
+        Collect only genuinely new messages without duplication.
+        
+        Args:
+            channel_usernames: List of channel usernames to collect from
+            limit: Maximum number of messages to collect per channel
+            fallback_hours: Hours to look back if message ID tracking is unavailable
+            
+        Returns:
+            List of processed message dictionaries
+        """
+        all_messages = []
+        last_message_tracking = await asyncio.to_thread(self._load_last_message_tracking)
+        
+        # Channels are collected concurrently; tracking is only updated here, once all are done
+        results = await self._gather_channels(
+            channel_usernames,
+            self._collect_new_channel_messages,
+            last_message_tracking,
+            limit,
+            fallback_hours
+        )
+        
+        for result in results:
+            if result is None:
+                continue
+            channel_id, channel_messages, newest_id = result
+            
+            # Update message tracking with the newest message ID
+            if channel_messages:
+                last_message_tracking[channel_id] = newest_id
+            
+            # Add all messages from this channel to the main collection. History comes
+            # newest first, so each channel is added oldest first and the final sort
+            # only has to merge already ordered runs
+            all_messages.extend(reversed(channel_messages))
         
-        # Save updated tracking information
-        self._save_last_message_tracking(last_message_tracking)
+        # Save updated tracking information without blocking the event loop
+        await asyncio.to_thread(self._save_last_message_tracking, last_message_tracking)
         
         # Sort messages by date
-        all_messages.sort(key=lambda x: x["date"])
+        all_messages.sort(key=itemgetter("date"))
         self.logger.info(f"Total messages collected from all channels: {len(all_messages)}")
         return all_messages
 
     def _load_last_message_tracking(self) -> Dict[str, int]:
         """Load the tracking data for last processed message IDs."""
-        tracking_file = os.path.join(os.getcwd(), "data", "last_message_tracking.json")
+        tracking_file = self.tracking_file
         
         if os.path.exists(tracking_file):
             try:
-                with open(tracking_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(tracking_file, 'rb') as f:
+                    tracking_data = loads(f.read())
+                self._saved_tracking = dict(tracking_data)
+                return tracking_data
             except Exception as e:
                 self.logger.error(f"Error loading message tracking data: {str(e)}")
         
@@ -255,134 +406,141 @@ class TelegramCollector:
 
     def _save_last_message_tracking(self, tracking_data: Dict[str, int]):
         """Save the tracking data for last processed message IDs."""
-        os.makedirs(os.path.join(os.getcwd(), "data"), exist_ok=True)
-        tracking_file = os.path.join(os.getcwd(), "data", "last_message_tracking.json")
-        
+        # Nothing to do if no channel advanced since the last load or save
+        if tracking_data == self._saved_tracking:
+            return
+            
         try:
-            with open(tracking_file, 'w', encoding='utf-8') as f:
-                json.dump(tracking_data, f, ensure_ascii=False, indent=2)
+            # Replaced atomically so a crash never leaves a truncated tracking file
+            dump_file(self.tracking_file, tracking_data)
+            self._saved_tracking = dict(tracking_data)
         except Exception as e:
             self.logger.error(f"Error saving message tracking data: {str(e)}")
 
-    async def get_new_messages(self, channel_usernames: List[str], limit: int = 100, since_hours: int = 24) -> List[Dict[str, Any]]:
-        all_messages = []
-        
-        # Create timezone-aware datetime for comparison
-        from datetime import timezone
-        since_date = datetime.now(timezone.utc) - timedelta(hours=since_hours)
+    async def _collect_channel_messages(self, username: str, limit: int, since_date: datetime) -> List[Dict[str, Any]]:
+        """
+        Collect the messages of one channel posted since a given date, for get_new_messages.
         
-        for username in channel_usernames:
+        Args:
+            username: Channel username
+            limit: Maximum number of messages to retrieve
+            since_date: Timezone-aware date of the oldest message to keep
+            
+        Returns:
+            List of processed message dictionaries, newest first
+        """
+        try:
+            self.logger.info(f"Attempting to access channel: {username}")
+            
             try:
-                self.logger.info(f"Attempting to access channel: {username}")
+                entity = await self._resolve_entity(username)
+            except ValueError as e:
+                self.logger.error(f"Invalid channel identifier for {username}: {str(e)}")
+                return []
+            except Exception as e:
+                self.logger.error(f"Failed to get entity for {username}: {str(e)}")
+                return []
                 
-                try:
-                    entity = await self.client.get_entity(username)
-                except ValueError as e:
-                    self.logger.error(f"Invalid channel identifier for {username}: {str(e)}")
-                    continue
-                except Exception as e:
-                    self.logger.error(f"Failed to get entity for {username}: {str(e)}")
-                    continue
-                    
-                self.logger.info(f"Successfully resolved entity for {username}: ID {entity.id}")
+            self.logger.info(f"Successfully resolved entity for {username}: ID {entity.id}")
+            
+            try:
+                channel_info = await self.get_channel_info(username, entity)
+            except Exception as e:
+                self.logger.error(f"Failed to get channel info for {username}: {str(e)}")
+                channel_info = {"id": entity.id, "title": username}
+            
+            # Get message history
+            self.logger.info(f"Retrieving message history for {username}")
+            messages = await self.client(GetHistoryRequest(
+                peer=entity,
+                limit=limit,
+                offset_date=None,
+                offset_id=0,
+                max_id=0,
+                min_id=0,
+                add_offset=0,
+                hash=0
+            ))
+            
+            self.logger.info(f"Retrieved {len(messages.messages)} raw messages from {username}")
+            
+            message_count = 0
+            channel_messages = []  # Track messages from this channel
+            pending_media = []  # (message data, message) pairs awaiting a media download
+            
+            for msg in messages.messages:
+                # Ensure message date is timezone-aware for comparison
+                msg_date = msg.date if msg.date.tzinfo is not None else msg.date.replace(tzinfo=timezone.utc)
                 
-                try:
-                    channel_info = await self.get_channel_info(username)
-                except Exception as e:
-                    self.logger.error(f"Failed to get channel info for {username}: {str(e)}")
-                    channel_info = {"id": entity.id, "title": username}
+                # History is newest first; the rest of the batch is older still
+                if msg_date < since_date:
+                    break
                 
-                # Get message history
-                self.logger.info(f"Retrieving message history for {username}")
-                messages = await self.client(GetHistoryRequest(
-                    peer=entity,
-                    limit=limit,
-                    offset_date=None,
-                    offset_id=0,
-                    max_id=0,
-                    min_id=0,
-                    add_offset=0,
-                    hash=0
-                ))
+                # Media is downloaded for the whole batch once the loop is done
+                media_type = None
                 
-                self.logger.info(f"Retrieved {len(messages.messages)} raw messages from {username}")
+                if isinstance(msg.media, MessageMediaPhoto):
+                    media_type = "photo"
+                elif isinstance(msg.media, MessageMediaDocument):
+                    media_type = "document"
                 
-                message_count = 0
-                channel_messages = []  # Track messages from this channel
+                # Check if this message is a reply; the replied-to text is filled in after the loop
+                reply_to_msg_id = None
+                if hasattr(msg, 'reply_to') and msg.reply_to:
+                    # Get the ID of the message being replied to
+                    reply_to_msg_id = msg.reply_to.reply_to_msg_id
                 
-                for msg in messages.messages:
-                    # Ensure message date is timezone-aware for comparison
-                    msg_date = msg.date
-                    if msg_date.tzinfo is None:
-                        msg_date = msg_date.replace(tzinfo=timezone.utc)
-                    
-                    if msg_date < since_date:
-                        continue
-                    
-                    # Download media if present
-                    media_path = await self.download_media(msg)
-                    media_type = None
-                    
-                    if isinstance(msg.media, MessageMediaPhoto):
-                        media_type = "photo"
-                    elif isinstance(msg.media, MessageMediaDocument):
-                        media_type = "document"
-                    
-                    # Check if this message is a reply
-                    reply_to_msg_id = None
-                    reply_to_msg_text = None
-                    
-                    if hasattr(msg, 'reply_to') and msg.reply_to:
-                        # Get the ID of the message being replied to
-                        reply_to_msg_id = msg.reply_to.reply_to_msg_id
-                        
-                        # Try to fetch the original message
-                        try:
-                            # Find the original message in the current batch first
-                            original_msg = next((m for m in messages.messages if m.id == reply_to_msg_id), None)
-                            
-                            # If not found in the current batch, try to fetch it from the server
-                            if not original_msg:
-                                original_msg = await self.client.get_messages(entity, ids=reply_to_msg_id)
-                                
-                            # If we found the original message, get its text
-                            if original_msg:
-                                reply_to_msg_text = original_msg.message if hasattr(original_msg, "message") else ""
+                # Extract message data as before
+                message_data = {
+                    "id": msg.id,
+                    "channel_id": entity.id,
+                    "channel_title": channel_info.get("title"),
+                    "channel_username": channel_info.get("username"),
+                    "channel_description": channel_info.get("description"),
+                    "date": msg_date.isoformat(),
+                    "text": msg.message if hasattr(msg, "message") else "",
+                    "media_path": None,
+                    "media_type": media_type,
+                    "views": msg.views if hasattr(msg, "views") else None,
+                    "forwards": msg.forwards if hasattr(msg, "forwards") else None,
+                    # Add reply information
+                    "reply_to_msg_id": reply_to_msg_id,
+                    "reply_to_msg_text": None
+                }
                                 
-                        except Exception as e:
-                            self.logger.warning(f"Could not fetch replied-to message {reply_to_msg_id}: {str(e)}")
-                    
-                    # Extract message data as before
-                    message_data = {
-                        "id": msg.id,
-                        "channel_id": entity.id,
-                        "channel_title": channel_info.get("title"),
-                        "channel_username": channel_info.get("username"),
-                        "channel_description": channel_info.get("description"),
-                        "date": msg_date.isoformat(),
-                        "text": msg.message if hasattr(msg, "message") else "",
-                        "media_path": media_path,
-                        "media_type": media_type,
-                        "views": msg.views if hasattr(msg, "views") else None,
-                        "forwards": msg.forwards if hasattr(msg, "forwards") else None,
-                        # Add reply information
-                        "reply_to_msg_id": reply_to_msg_id,
-                        "reply_to_msg_text": reply_to_msg_text
-                    }
-                                    
-                    channel_messages.append(message_data)
-                    message_count += 1
-                
-                # Add all messages from this channel to the main collection
-                all_messages.extend(channel_messages)
-                
-                self.logger.info(f"Added {message_count} messages from {username} after filtering")
-                
-            except Exception as e:
-                self.logger.error(f"Error retrieving messages from {username}: {str(e)}")
+                channel_messages.append(message_data)
+                message_count += 1
+                if msg.media:
+                    pending_media.append((message_data, msg))
+            
+            # Download media and resolve replied-to messages for this channel concurrently
+            await asyncio.gather(
+                self._download_media_batch(pending_media),
+                self._resolve_reply_texts(entity, messages.messages, channel_messages)
+            )
+            self.logger.info(f"Added {message_count} messages from {username} after filtering")
+            return channel_messages
+            
+        except Exception as e:
+            self.logger.error(f"Error retrieving messages from {username}: {str(e)}")
+            return []
+    
+    async def get_new_messages(self, channel_usernames: List[str], limit: int = 100, since_hours: int = 24) -> List[Dict[str, Any]]:
+        all_messages = []
+        
+        # Create timezone-aware datetime for comparison
+        since_date = datetime.now(timezone.utc) - timedelta(hours=since_hours)
+        
+        # Channels are collected concurrently
+        results = await self._gather_channels(channel_usernames, self._collect_channel_messages, limit, since_date)
+        
+        # Add all messages to the main collection. History comes newest first, so each
+        # channel is added oldest first and the final sort only has to merge ordered runs
+        for channel_messages in results:
+            all_messages.extend(reversed(channel_messages))
         
         # Sort messages by date
-        all_messages.sort(key=lambda x: x["date"])
+        all_messages.sort(key=itemgetter("date"))
         self.logger.info(f"Total messages collected from all channels: {len(all_messages)}")
         return all_messages
     
@@ -394,8 +552,13 @@ class TelegramCollector:
             messages: List of message dictionaries
             filepath: Path to save the JSON file
         """
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(messages, f, ensure_ascii=False, indent=2)
+        # Serialize one message at a time so the whole file never sits in memory at once
+        with open(filepath, 'wb', buffering=1 << 20) as f:
+            f.write(b'[')
+            for i, message in enumerate(messages):
+                f.write(b',\n' if i else b'\n')
+                f.write(dumps(message, indent=True))
+            f.write(b'\n]')
         self.logger.info(f"Saved {len(messages)} messages to {filepath}")
 
 